@@ -0,0 +1,186 @@
+# analysis_pipeline.py
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (LANGUAGE_OPTIONS, LANGUAGE_SYNTAX, DEFAULT_SLEEP, DEFAULT_PROMPT_TOKEN_BUDGET, DEFAULT_SINGLE_SOLUTION_PROMPT,
+                    DEFAULT_COMPARISON_PROMPT, DEFAULT_ALL_TOGETHER_PROMPT, GEMINI_WORKERS, PIPELINE_QUEUE_SIZE,
+                    DISTINCT_OVERFETCH, MAX_DISTINCT_CANDIDATES)
+from scraping_logic import fetch_problem_statement, list_submissions, get_code_with_retry, fetch_worker_count
+from prompt_packing import pack_prompt_inputs
+from corpus_store import get_corpus_store
+from similarity import NearDuplicateIndex, normalize_tokens
+from gemini_integration import request_gemini_response
+from concurrency import with_context
+from tracing import Tracer, current_span_id, span, use_tracer
+
+DEFAULT_PARAMS = {
+    'analysis_mode': "One by One", 'contest_id': "", 'problem_index': "", 'language_name': LANGUAGE_OPTIONS[0], 'n': 3,
+    'backend': "HTTP", 'sleep_time': DEFAULT_SLEEP, 'max_chars': 4000, 'token_budget': DEFAULT_PROMPT_TOKEN_BUDGET,
+    'use_cache': True, 'use_llm_cache': True, 'distinct': False, 'save_to_corpus': True, 'single_prompt': DEFAULT_SINGLE_SOLUTION_PROMPT,
+    'comp_prompt': DEFAULT_COMPARISON_PROMPT, 'all_together_prompt': DEFAULT_ALL_TOGETHER_PROMPT,
+}
+
+class PipelineError(Exception):
+    pass
+
+def build_params(**overrides) -> dict:
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown analysis parameters: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_PARAMS, **overrides}
+
+def build_single_prompt(params, ps, solution):
+    packed = pack_prompt_inputs(ps, [solution['code']], LANGUAGE_SYNTAX.get(params['language_name'], "text"), params['token_budget'], params['max_chars'])
+    return params['single_prompt'].format(problem_statement=packed['problem_statement'], language=params['language_name'], code=packed['codes'][0])
+
+def build_combined_prompt(params, ps, solutions):
+    packed = pack_prompt_inputs(ps, [sol['code'] for sol in solutions], LANGUAGE_SYNTAX.get(params['language_name'], "text"), params['token_budget'], params['max_chars'])
+    solutions_text = "\n".join([f"--- Solution #{i+1} (ID: {s['id']})\n```{code}```" for i, (s, code) in enumerate(zip(solutions, packed['codes']))])
+    template = params['all_together_prompt'] if params['analysis_mode'] == "All Together" else params['comp_prompt']
+    return template.format(problem_statement=packed['problem_statement'], solutions=solutions_text), packed['stats']
+
+def summarize_clusters(members, representatives):
+    clusters = [{'representative': representatives.get(cluster), 'size': len(ids), 'ids': ids} for cluster, ids in members.items()]
+    return sorted(clusters, key=lambda cluster: (cluster['representative'] is None, -cluster['size']))
+
+def apply_responses(results, responses):
+    if results['mode'] == "All Together":
+        results['combined_analysis'], results['combined_error'] = responses['combined']['text'], responses['combined']['error']
+        return results
+    for sol in results['solutions']:
+        sol['analysis'], sol['error'] = responses[sol['id']]['text'], responses[sol['id']]['error']
+    if 'comparison' in responses:
+        results['comparison'], results['comparison_error'] = responses['comparison']['text'], responses['comparison']['error']
+    return results
+
+def run_pipeline(params, on_event=None, tracer=None):
+    tracer = tracer or Tracer()
+    with use_tracer(tracer), span("run_pipeline", contest_id=params['contest_id'], problem_index=params['problem_index'],
+                                  mode=params['analysis_mode'], n=params['n'], backend=params['backend']):
+        results = _run_pipeline(params, on_event or (lambda event: None), tracer)
+        if params['save_to_corpus']:
+            with span("corpus_save", solutions=len(results['solutions'])) as attributes:
+                try:
+                    results['corpus_run_id'] = get_corpus_store().save_run(results)
+                except sqlite3.Error as e:
+                    # The analysis itself succeeded; a corpus write failure should not throw it away.
+                    attributes['error'] = f"{type(e).__name__}: {e}"
+    results['trace'] = tracer.spans
+    return results
+
+def _run_pipeline(params, emit, tracer):
+    root_span_id = current_span_id()
+    def record_phase(name, started, **attributes):
+        tracer.add(name, started, (time.time() - started) * 1000, attributes, parent_id=root_span_id)
+    contest_id, problem_index, backend = params['contest_id'], params['problem_index'], params['backend']
+    lang_index = LANGUAGE_OPTIONS.index(params['language_name'])
+    stop = threading.Event()
+    statement_pool = ThreadPoolExecutor(max_workers=1)
+    code_pool = ThreadPoolExecutor(max_workers=fetch_worker_count(backend))
+    analyze_pool = ThreadPoolExecutor(max_workers=GEMINI_WORKERS)
+    analysis_slots = threading.Semaphore(GEMINI_WORKERS)
+    fetched = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    def fetch_code(position, submission):
+        try:
+            code = get_code_with_retry(contest_id, submission['id'], params['sleep_time'], backend, params['use_cache'])
+        except Exception:
+            code = None
+        # Block while the analysis stage is saturated, but give up if the pipeline has been abandoned.
+        while not stop.is_set():
+            try:
+                fetched.put((position, submission, code), timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def analyze(key, prompt):
+        try:
+            result = request_gemini_response(prompt, params['use_llm_cache'], on_chunk=lambda text: emit({'type': 'chunk', 'key': key, 'text': text}))
+        finally:
+            analysis_slots.release()
+        emit({'type': 'done', 'key': key, 'result': result})
+        return result
+
+    analyze_started = []
+    def start_analysis(key, label, prompt):
+        emit({'type': 'start', 'key': key, 'label': label})
+        analysis_slots.acquire()
+        analyze_started[:1] = analyze_started[:1] or [time.time()]
+        return analyze_pool.submit(with_context(analyze), key, prompt)
+
+    try:
+        problem_started = time.time()
+        emit({'type': 'stage', 'stage': 'problem', 'status': 'running'})
+        if backend == "Browser":
+            # The browser backend drives a single window, so the statement must be read before anything else is opened.
+            ps = fetch_problem_statement(contest_id, problem_index, params['sleep_time'], backend, params['use_cache'])
+            statement_future = None
+        else:
+            statement_future = statement_pool.submit(with_context(fetch_problem_statement), contest_id, problem_index, params['sleep_time'], backend, params['use_cache'])
+        # Distinct mode over-fetches candidates so near-duplicates can be skipped and still leave n solutions to analyze.
+        limit = min(MAX_DISTINCT_CANDIDATES, params['n'] * DISTINCT_OVERFETCH) if params['distinct'] else params['n']
+        submissions = list_submissions(contest_id, problem_index, lang_index, params['sleep_time'], backend, params['use_cache'], limit=limit)
+        fetch_started = time.time()
+        for position, submission in enumerate(submissions):
+            code_pool.submit(with_context(fetch_code), position, submission)
+        if statement_future is not None:
+            ps = statement_future.result()
+        if not ps:
+            raise PipelineError("Could not fetch Problem Statement. Please check inputs or increase wait time.")
+        if not submissions:
+            raise PipelineError("No submissions found for the selected criteria.")
+        record_phase("phase.problem", problem_started, submissions=len(submissions))
+        emit({'type': 'stage', 'stage': 'problem', 'status': 'done'})
+
+        solutions, futures = {}, {}
+        duplicates, members, representatives = NearDuplicateIndex(), {}, {}
+        for fetched_count in range(1, len(submissions) + 1):
+            position, submission, code = fetched.get()
+            emit({'type': 'progress', 'stage': 'fetch', 'done': fetched_count, 'total': len(submissions), 'ok': bool(code)})
+            if not code:
+                continue
+            if params['distinct']:
+                syntax = LANGUAGE_SYNTAX.get(submission.get('language') or params['language_name'], "text")
+                with span("dedup_submission", submission_id=submission['id']) as attributes:
+                    cluster, is_new = duplicates.add(normalize_tokens(code, syntax))
+                    attributes.update(cluster=cluster, duplicate=not is_new)
+                members.setdefault(cluster, []).append(submission['id'])
+                if not is_new or len(solutions) >= params['n']:
+                    continue
+                representatives[cluster] = submission['id']
+            solution = {**submission, 'code': code}
+            solutions[position] = solution
+            if params['analysis_mode'] == "One by One":
+                futures[solution['id']] = start_analysis(solution['id'], f"Solution ID: {solution['id']}", build_single_prompt(params, ps, solution))
+
+        record_phase("phase.fetch", fetch_started, fetched=len(solutions), failed=len(submissions) - len(solutions))
+        ordered = [solutions[position] for position in sorted(solutions)]
+        if not ordered:
+            raise PipelineError("Successfully found submission IDs, but failed to scrape the code for any of them. This might be due to a Codeforces UI update or network issues.")
+        results = {'contest_id': contest_id, 'problem_index': problem_index, 'problem_statement': ps, 'solutions': ordered,
+                   'mode': params['analysis_mode'], 'language': params['language_name']}
+        if params['distinct']:
+            results['clusters'] = summarize_clusters(members, representatives)
+            sizes = {cluster['representative']: cluster['size'] for cluster in results['clusters']}
+            for solution in ordered:
+                solution['cluster_size'] = sizes[solution['id']]
+        if params['analysis_mode'] == "All Together" or len(ordered) > 1:
+            prompt, results['packing'] = build_combined_prompt(params, ps, ordered)
+            key, label = ("combined", "📚 Combined Analysis Report") if params['analysis_mode'] == "All Together" else ("comparison", "🏆 Final Verdict")
+            futures[key] = start_analysis(key, label, prompt)
+        else:
+            results['packing'] = build_combined_prompt(params, ps, ordered)[1]
+
+        responses = {key: future.result() for key, future in futures.items()}
+        record_phase("phase.analyze", analyze_started[0] if analyze_started else time.time(), calls=len(responses))
+        return apply_responses(results, responses)
+    finally:
+        stop.set()
+        statement_pool.shutdown(wait=False, cancel_futures=True)
+        code_pool.shutdown(wait=False, cancel_futures=True)
+        analyze_pool.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,129 @@
+# batch_runner.py
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+import google.generativeai as genai
+
+from config import BATCH_WORKERS
+from analysis_pipeline import PipelineError, build_params, run_pipeline
+from scraping_logic import list_contest_problems
+
+def job_key(params) -> str:
+    prompts = "\0".join([params['single_prompt'], params['comp_prompt'], params['all_together_prompt']])
+    digest = hashlib.sha1(prompts.encode("utf-8")).hexdigest()[:8]
+    key = f"{params['contest_id']}:{params['problem_index']}:{params['language_name']}:{params['analysis_mode']}:{params['n']}:{digest}"
+    return key + ":distinct" if params.get('distinct') else key
+
+def expand_jobs(spec) -> list:
+    defaults = spec.get('defaults', {})
+    entries = [{'contest_id': str(contest_id)} for contest_id in spec.get('contests', [])] + spec.get('jobs', [])
+    jobs = []
+    for entry in entries:
+        entry = {**defaults, **entry}
+        contest_id = str(entry.pop('contest_id'))
+        problems = entry.pop('problems', None) or list_contest_problems(contest_id)
+        if not problems:
+            print(f"Could not list problems for contest {contest_id}; skipping.", file=sys.stderr)
+        for problem_index in problems:
+            jobs.append(build_params(**entry, contest_id=contest_id, problem_index=str(problem_index).upper()))
+    return jobs
+
+def load_results_file(source) -> list:
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            return []
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = source.read().decode("utf-8").splitlines()
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # A run killed mid-write can leave a partial last line; that job simply runs again on resume.
+            continue
+    return records
+
+def write_parquet(records, path):
+    try:
+        import pandas as pd
+    except ImportError:
+        print("Parquet output needs pandas and pyarrow installed; JSONL output was still written.", file=sys.stderr)
+        return
+    pd.DataFrame(records).to_parquet(path, index=False)
+
+def run_batch(jobs, output_path, workers=BATCH_WORKERS, log=print) -> dict:
+    done_keys = {record.get('job_key') for record in load_results_file(output_path)}
+    pending = [params for params in jobs if job_key(params) not in done_keys]
+    summary = {'total': len(jobs), 'skipped': len(jobs) - len(pending), 'completed': 0, 'failed': 0}
+    log(f"{summary['total']} jobs, {summary['skipped']} already done, {len(pending)} to run.")
+    write_lock = threading.Lock()
+
+    def run_job(params):
+        started = time.time()
+        results = run_pipeline(params)
+        record = {**results, 'job_key': job_key(params), 'contest_id': params['contest_id'], 'problem_index': params['problem_index'],
+                  'duration_s': round(time.time() - started, 2), 'completed_at': time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with write_lock:
+            with open(output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return record
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {executor.submit(run_job, params): params for params in pending}
+    try:
+        for position, future in enumerate(as_completed(futures), 1):
+            key = job_key(futures[future])
+            try:
+                record = future.result()
+                summary['completed'] += 1
+                log(f"[{position}/{len(pending)}] {key} done in {record['duration_s']}s")
+            except PipelineError as e:
+                summary['failed'] += 1
+                log(f"[{position}/{len(pending)}] {key} failed: {e}")
+            except Exception as e:
+                summary['failed'] += 1
+                log(f"[{position}/{len(pending)}] {key} failed unexpectedly: {e}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return summary
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze whole Codeforces contests without the Streamlit UI.")
+    parser.add_argument("job_file", help="JSON job file with 'defaults' plus 'contests' and/or 'jobs' entries.")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL results file; also used as the resume checkpoint.")
+    parser.add_argument("--parquet", help="Also write all results to this Parquet file when the run ends.")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_WORKERS, help="Problems analyzed in parallel.")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        print("GEMINI_API_KEY not found in .env file.", file=sys.stderr)
+        return 2
+    genai.configure(api_key=gemini_api_key)
+
+    with open(args.job_file, encoding="utf-8") as f:
+        jobs = expand_jobs(json.load(f))
+    try:
+        summary = run_batch(jobs, args.output, args.workers)
+    except KeyboardInterrupt:
+        print("Interrupted. Finished problems are saved; rerun the same command to resume.", file=sys.stderr)
+        return 130
+    if args.parquet:
+        write_parquet(load_results_file(args.output), args.parquet)
+    print(f"Completed {summary['completed']}, failed {summary['failed']}, skipped {summary['skipped']} of {summary['total']}.")
+    return 1 if summary['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,54 @@
+# fake_model.py
+
+import threading
+import time
+import google.generativeai as genai
+
+import gemini_integration
+from prompt_packing import estimate_tokens
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeModel:
+    # Shared across instances so a run can count calls no matter which cached client made them.
+    calls = 0
+    prompt_tokens = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model_name, system_instruction=None, latency: float = 0.5, tokens_per_second: float = 200.0,
+                 output_tokens: int = 300, chunk_tokens: int = 20):
+        self.model_name = model_name
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.chunk_tokens = chunk_tokens
+
+    def _chunks(self, prompt):
+        with FakeModel._lock:
+            FakeModel.calls += 1
+            FakeModel.prompt_tokens += estimate_tokens(str(prompt))
+        time.sleep(self.latency)
+        for start in range(0, self.output_tokens, self.chunk_tokens):
+            count = min(self.chunk_tokens, self.output_tokens - start)
+            time.sleep(count / self.tokens_per_second)
+            yield FakeChunk("word " * count)
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        if stream:
+            return self._chunks(prompt)
+        return FakeChunk("".join(chunk.text for chunk in self._chunks(prompt)))
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.calls = 0
+            cls.prompt_tokens = 0
+
+def install_fake_model(latency: float, tokens_per_second: float, output_tokens: int = 300):
+    def make_model(model_name, system_instruction=None):
+        return FakeModel(model_name, system_instruction, latency, tokens_per_second, output_tokens)
+    genai.GenerativeModel = make_model
+    gemini_integration._models.clear()
+    return FakeModel
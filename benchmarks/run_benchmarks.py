@@ -0,0 +1,136 @@
+# run_benchmarks.py
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubServer
+
+PHASES = ("phase.problem", "phase.fetch", "phase.analyze")
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_once(service, params, fake_model, server):
+    calls, requests_before = fake_model.calls, server.requests
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    # Same path as a UI session: submit to the shared job service and drain its events until the job finishes.
+    job = service.submit(params)
+    try:
+        cursor, complete = 0, False
+        while not complete:
+            _, cursor, complete = job.events_since(cursor, timeout=0.05)
+    finally:
+        service.release(job)
+    results = job.outcome()
+    elapsed = time.perf_counter() - started
+    phases = {name: sum(record['duration_ms'] for record in results['trace'] if record['name'] == name) / 1000 for name in PHASES}
+    return {'latency_s': elapsed, 'peak_mb': tracemalloc.get_traced_memory()[1] / 2 ** 20, 'phases_s': phases,
+            'model_calls': fake_model.calls - calls, 'http_requests': server.requests - requests_before,
+            'solutions': len(results['solutions'])}
+
+def summarize(config, runs) -> dict:
+    latencies = [run['latency_s'] for run in runs]
+    return {
+        **config, 'runs': len(runs),
+        'p50_s': round(percentile(latencies, 0.5), 3), 'p95_s': round(percentile(latencies, 0.95), 3),
+        'phases_p50_s': {name: round(percentile([run['phases_s'][name] for run in runs], 0.5), 3) for name in PHASES},
+        'peak_mb': round(max(run['peak_mb'] for run in runs), 2),
+        'model_calls': max(run['model_calls'] for run in runs), 'http_requests': max(run['http_requests'] for run in runs),
+    }
+
+def config_key(summary) -> str:
+    return f"n={summary['n']} mode={summary['analysis_mode']} max_chars={summary['max_chars']}"
+
+def compare_to_baseline(report, baseline_path, tolerance) -> list:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {config_key(summary): summary for summary in json.load(f)['results']}
+    regressions = []
+    for summary in report['results']:
+        previous = baseline.get(config_key(summary))
+        if previous and summary['p95_s'] > previous['p95_s'] * (1 + tolerance):
+            regressions.append(f"{config_key(summary)}: p95 {previous['p95_s']}s -> {summary['p95_s']}s")
+        if previous and summary['model_calls'] > previous['model_calls']:
+            regressions.append(f"{config_key(summary)}: model calls {previous['model_calls']} -> {summary['model_calls']}")
+    return regressions
+
+def print_table(results):
+    header = f"{'config':<44} {'p50':>7} {'p95':>7} {'problem':>8} {'fetch':>7} {'analyze':>8} {'peak MB':>8} {'calls':>6} {'http':>5}"
+    print(header)
+    print("-" * len(header))
+    for summary in results:
+        phases = summary['phases_p50_s']
+        print(f"{config_key(summary):<44} {summary['p50_s']:>7.2f} {summary['p95_s']:>7.2f} {phases['phase.problem']:>8.2f} "
+              f"{phases['phase.fetch']:>7.2f} {phases['phase.analyze']:>8.2f} {summary['peak_mb']:>8.2f} "
+              f"{summary['model_calls']:>6} {summary['http_requests']:>5}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline offline against recorded pages and a fake model.")
+    parser.add_argument("--n", type=int, nargs="+", default=[1, 5], help="Solution counts to benchmark.")
+    parser.add_argument("--modes", nargs="+", default=["One by One", "All Together"], help="Analysis modes to benchmark.")
+    parser.add_argument("--max-chars", type=int, nargs="+", default=[2000, 8000], help="Per-solution character limits to benchmark.")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Runs per configuration.")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="Fake model time to first token, in seconds.")
+    parser.add_argument("--model-tps", type=float, default=300.0, help="Fake model output throughput, in tokens per second.")
+    parser.add_argument("--model-output", type=int, default=200, help="Fake model tokens per response.")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Stub server delay per response, in seconds.")
+    parser.add_argument("--fetch-rate", type=float, help="Override the per-host request rate limit (requests per second).")
+    parser.add_argument("--json", help="Write the report to this JSON file.")
+    parser.add_argument("--baseline", help="Earlier JSON report; exit non-zero if p95 latency or model calls regress.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown against the baseline, as a fraction.")
+    args = parser.parse_args(argv)
+
+    server = StubServer(latency=args.http_latency).start()
+    cache_dir = tempfile.mkdtemp(prefix="cf-analyser-bench-")
+    # Cache locations are read at import time, so point them at a throwaway directory before importing the app.
+    os.environ["CODEFORCES_BASE_URL"] = server.url
+    os.environ["CF_ANALYSER_CACHE_DIR"] = cache_dir
+    os.environ["CF_ANALYSER_CORPUS_PATH"] = os.path.join(cache_dir, "corpus.sqlite3")
+    import scraping_logic
+    from analysis_pipeline import build_params
+    from job_service import JobService
+    from fake_model import install_fake_model
+
+    if args.fetch_rate:
+        scraping_logic.FETCH_RATE_PER_HOST = args.fetch_rate
+    fake_model = install_fake_model(args.model_latency, args.model_tps, args.model_output)
+    service = JobService()
+    tracemalloc.start()
+    results = []
+    try:
+        for n, mode, max_chars in itertools.product(args.n, args.modes, args.max_chars):
+            config = {'n': n, 'analysis_mode': mode, 'max_chars': max_chars}
+            params = build_params(contest_id="2000", problem_index="A", n=n, analysis_mode=mode, max_chars=max_chars,
+                                  use_cache=False, use_llm_cache=False)
+            runs = [run_once(service, params, fake_model, server) for _ in range(args.repeats)]
+            results.append(summarize(config, runs))
+            print(f"{config_key(results[-1])}: p50 {results[-1]['p50_s']}s", file=sys.stderr)
+    finally:
+        tracemalloc.stop()
+        server.stop()
+
+    report = {'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"), 'settings': {key: value for key, value in vars(args).items()
+                                                                             if key not in ("json", "baseline")}, 'results': results}
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        regressions = compare_to_baseline(report, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
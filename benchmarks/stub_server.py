@@ -0,0 +1,90 @@
+# stub_server.py
+
+import argparse
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIRST_SUBMISSION_ID = 300000001
+
+def load_fixtures(directory=FIXTURES_DIR) -> dict:
+    fixtures = {}
+    for name in os.listdir(directory):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), "rb") as f:
+                fixtures[name[:-len(".html")]] = f.read()
+    return fixtures
+
+def route(fixtures, path):
+    path = path.split("?", 1)[0]
+    if re.fullmatch(r"/contest/\d+/problem/\w+", path):
+        return fixtures["problem"]
+    if re.fullmatch(r"/contest/\d+/status(/\w+/page/\d+)?", path):
+        return fixtures["status"]
+    match = re.fullmatch(r"/contest/\d+/submission/(\d+)", path)
+    if match:
+        sources = sorted(name for name in fixtures if name.startswith("submission_"))
+        return fixtures[sources[(int(match.group(1)) - FIRST_SUBMISSION_ID) % len(sources)]]
+    return None
+
+class StubServer:
+    def __init__(self, port: int = 0, latency: float = 0.0, fixtures: dict | None = None):
+        fixtures = fixtures or load_fixtures()
+        self.requests = 0
+        self.log = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                with server._lock:
+                    server.requests += 1
+                    server.log.append((self.command, self.path))
+                if latency:
+                    time.sleep(latency)
+                body = route(fixtures, self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._respond()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded Codeforces pages for offline runs.")
+    parser.add_argument("-p", "--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    args = parser.parse_args(argv)
+    server = StubServer(args.port, args.latency)
+    print(f"Serving fixtures at {server.url}; set CODEFORCES_BASE_URL to this address.")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
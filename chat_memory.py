@@ -0,0 +1,51 @@
+# chat_memory.py
+
+from config import CHAT_CONTEXT_TOKEN_BUDGET, CHAT_HISTORY_TOKEN_BUDGET, CHAT_RECENT_MESSAGES, CHAT_SUMMARY_TOKENS
+from prompt_packing import estimate_tokens, pack_prompt_inputs, truncate_to_tokens
+
+def build_chat_context(problem_statement, code, analysis, syntax, token_budget=CHAT_CONTEXT_TOKEN_BUDGET) -> str:
+    analysis = truncate_to_tokens(analysis or "", token_budget // 3)
+    packed = pack_prompt_inputs(problem_statement, [code], syntax, token_budget - estimate_tokens(analysis))
+    return f"Problem Statement:\n{packed['problem_statement']}\n\nSolution Code:\n```\n{packed['codes'][0]}\n```\n\nAI Analysis:\n{analysis}"
+
+class ChatMemory:
+    def __init__(self, context: str, history_budget: int = CHAT_HISTORY_TOKEN_BUDGET, recent_messages: int = CHAT_RECENT_MESSAGES):
+        # The static context is sent once per request as the system instruction, never repeated in the history.
+        self.context = context
+        self.history_budget = history_budget
+        self.recent_messages = recent_messages
+        self.messages = []
+        self.summary = ""
+        self.folded = 0
+        self._recent_tokens = 0
+
+    @property
+    def recent(self) -> list:
+        return self.messages[self.folded:]
+
+    def add_exchange(self, prompt: str, reply: str):
+        self.messages += [{'role': "user", 'text': prompt}, {'role': "model", 'text': reply}]
+        self._recent_tokens += estimate_tokens(prompt) + estimate_tokens(reply)
+
+    def contents(self, prompt: str) -> list:
+        contents = []
+        if self.summary:
+            contents += [{'role': "user", 'parts': [f"Summary of our conversation so far:\n{self.summary}"]},
+                         {'role': "model", 'parts': ["Understood."]}]
+        contents += [{'role': message['role'], 'parts': [message['text']]} for message in self.recent]
+        return contents + [{'role': "user", 'parts': [prompt]}]
+
+    def messages_to_fold(self) -> list:
+        # Fold whole user/model exchanges, oldest first, down to half the budget so summaries are not redone every turn.
+        recent, tokens, count = self.recent, self._recent_tokens, 0
+        if tokens <= self.history_budget:
+            return []
+        while tokens > self.history_budget // 2 and len(recent) - count > self.recent_messages:
+            tokens -= sum(estimate_tokens(message['text']) for message in recent[count:count + 2])
+            count += 2
+        return recent[:count]
+
+    def fold(self, summary: str, count: int):
+        self._recent_tokens -= sum(estimate_tokens(message['text']) for message in self.recent[:count])
+        self.summary = truncate_to_tokens(summary.strip(), CHAT_SUMMARY_TOKENS)
+        self.folded += count
@@ -0,0 +1,65 @@
+# concurrency.py
+
+import contextvars
+import random
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(host: str, rate: float, capacity: float) -> TokenBucket:
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = TokenBucket(rate, capacity)
+        return _rate_limiters[host]
+
+_limits = {}
+_limits_lock = threading.Lock()
+
+def get_concurrency_limit(name: str, limit: int) -> threading.BoundedSemaphore:
+    # Process-wide caps shared by every session and job, unlike the per-run worker pools.
+    with _limits_lock:
+        if name not in _limits:
+            _limits[name] = threading.BoundedSemaphore(limit)
+        return _limits[name]
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+def retry_with_backoff(func, retries: int, base_delay: float, max_delay: float, should_retry=lambda result: not result):
+    result = None
+    for attempt in range(retries + 1):
+        result = func()
+        if not should_retry(result):
+            return result
+        if attempt < retries:
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+    return result
+
+def with_context(func):
+    # Worker threads start with an empty context; carry the caller's (e.g. the active tracer) across.
+    context = contextvars.copy_context()
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return run
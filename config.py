@@ -1,7 +1,67 @@
 # config.py
 
+import os
+
 DEFAULT_SLEEP = 6
 
+FETCH_BACKENDS = ["HTTP", "Browser"]
+# Overridden by the CODEFORCES_BASE_URL environment variable, read on every request (e.g. to point at benchmarks/stub_server.py).
+CODEFORCES_BASE_URL = "https://codeforces.com"
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 16
+HTTP_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+MAX_SOLUTIONS = 30
+DEFAULT_SUBMISSION_LIMIT = 50
+MAX_STATUS_PAGES = 20
+FETCH_WORKERS = 4
+FETCH_RATE_PER_HOST = 2.0
+FETCH_BURST = 4
+FETCH_RETRIES = 3
+FETCH_BACKOFF_BASE = 1.0
+FETCH_BACKOFF_MAX = 8.0
+
+CACHE_DIR = os.getenv("CF_ANALYSER_CACHE_DIR", ".cache")
+SCRAPE_CACHE_PATH = os.path.join(CACHE_DIR, "scrape_cache.sqlite3")
+SCRAPE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+STATUS_CACHE_TTL = 15 * 60
+
+CORPUS_PATH = os.getenv("CF_ANALYSER_CORPUS_PATH", os.path.join(CACHE_DIR, "corpus.sqlite3"))
+CORPUS_SEARCH_LIMIT = 50
+
+GEMINI_MODEL = "gemini-1.5-flash"
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+LLM_CACHE_MAX_BYTES = 128 * 1024 * 1024
+GEMINI_WORKERS = 12
+GEMINI_RETRIES = 4
+GEMINI_BACKOFF_BASE = 2.0
+GEMINI_BACKOFF_MAX = 30.0
+GEMINI_MODEL_CACHE_SIZE = 32
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 12000
+STATEMENT_TOKEN_SHARE = 0.3
+
+CHAT_CONTEXT_TOKEN_BUDGET = 6000
+CHAT_HISTORY_TOKEN_BUDGET = 3000
+CHAT_RECENT_MESSAGES = 6
+CHAT_SUMMARY_TOKENS = 500
+
+CODE_PREVIEW_LINES = 40
+
+DISTINCT_OVERFETCH = 4
+MAX_DISTINCT_CANDIDATES = 200
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+PIPELINE_QUEUE_SIZE = 4
+BATCH_WORKERS = 2
+
+JOB_WORKERS = 4
+GLOBAL_FETCH_CONCURRENCY = 8
+GLOBAL_GEMINI_CONCURRENCY = 16
+
 ANALYSIS_MODES = ["One by One", "All Together"]
 
 LANGUAGE_OPTIONS = [
@@ -55,4 +115,18 @@ Code Solutions to Analyze:
 For your report, please perform the following steps:
 Individual Analysis: For each solution provided, create a separate section. In each section, explain the code, its core intuition, and its time and space complexity.
 Comparative Analysis: After analyzing all solutions individually, provide a final summary. Compare the different approaches, discuss their efficiency and style, and declare which solution you believe is the "best" overall, justifying your choice.
-Format the entire response using Markdown."""
\ No newline at end of file
+Format the entire response using Markdown."""
+
+CHAT_SYSTEM_PROMPT = """You are an expert competitive programming AI assistant. The user has questions regarding the following context. Answer them concisely and accurately.
+
+---CONTEXT---
+{context}
+---END CONTEXT---"""
+
+CHAT_SUMMARY_PROMPT = """Condense the following conversation between a user and a competitive programming assistant into a brief summary of at most {max_tokens} tokens. Keep the user's questions, the conclusions reached, and any code details or decisions that later questions may refer to. Reply with the summary only.
+
+**Earlier Summary:**
+{summary}
+
+**New Messages:**
+{messages}"""
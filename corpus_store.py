@@ -0,0 +1,135 @@
+# corpus_store.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from config import CORPUS_PATH, LANGUAGE_SYNTAX
+from prompt_packing import detect_syntax
+from similarity import KEYWORDS
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_IDENTIFIER_PARTS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_QUERY_TERMS = re.compile(r"\w+")
+
+def code_identifiers(code: str) -> Counter:
+    # Both whole names and their snake/camel-case parts are indexed, so "seg" finds SegTree, seg_tree and segtree alike.
+    counts = Counter()
+    for name in _IDENTIFIER.findall(code):
+        if name in KEYWORDS or len(name) < 3:
+            continue
+        counts[name.lower()] += 1
+        parts = [part.lower() for part in _IDENTIFIER_PARTS.findall(name)]
+        if len(parts) > 1:
+            counts.update(part for part in parts if len(part) >= 3)
+    return counts
+
+def fts_query(text: str) -> str:
+    return " ".join(f'"{term}"' for term in _QUERY_TERMS.findall(text))
+
+_corpus_store = None
+_corpus_store_lock = threading.Lock()
+
+def get_corpus_store() -> "CorpusStore":
+    global _corpus_store
+    with _corpus_store_lock:
+        if _corpus_store is None:
+            _corpus_store = CorpusStore(CORPUS_PATH)
+        return _corpus_store
+
+class CorpusStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, contest_id TEXT NOT NULL, problem_index TEXT NOT NULL, mode TEXT NOT NULL,
+                                             language TEXT, created_at REAL NOT NULL, payload TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS solutions (id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs (id),
+                                                  submission_id TEXT NOT NULL, language TEXT, syntax TEXT NOT NULL, author TEXT);
+            CREATE INDEX IF NOT EXISTS solutions_syntax ON solutions (syntax);
+            CREATE INDEX IF NOT EXISTS solutions_submission ON solutions (submission_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS solutions_fts USING fts5 (problem, code, analysis, tokenize = 'porter unicode61');
+            CREATE TABLE IF NOT EXISTS identifiers (identifier TEXT NOT NULL, solution_id INTEGER NOT NULL, occurrences INTEGER NOT NULL,
+                                                    PRIMARY KEY (identifier, solution_id)) WITHOUT ROWID;
+        """)
+
+    def save_run(self, results: dict) -> int:
+        solutions = results.get('solutions') or []
+        contest_id, problem_index, mode = str(results.get('contest_id', "")), str(results.get('problem_index', "")), results.get('mode', "")
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                run_id = self._conn.execute(
+                    "INSERT INTO runs (contest_id, problem_index, mode, language, created_at, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                    (contest_id, problem_index, mode, results.get('language'), time.time(), json.dumps(results, ensure_ascii=False))).lastrowid
+                for sol in solutions:
+                    self._remove_solution(contest_id, problem_index, mode, sol['id'])
+                    syntax = LANGUAGE_SYNTAX.get(sol.get('language') or results.get('language'), detect_syntax(sol['code']))
+                    solution_id = self._conn.execute("INSERT INTO solutions (run_id, submission_id, language, syntax, author) VALUES (?, ?, ?, ?, ?)",
+                                                     (run_id, sol['id'], sol.get('language'), syntax, sol.get('author'))).lastrowid
+                    self._conn.execute("INSERT INTO solutions_fts (rowid, problem, code, analysis) VALUES (?, ?, ?, ?)",
+                                       (solution_id, results.get('problem_statement') or "", sol['code'],
+                                        sol.get('analysis') or results.get('combined_analysis') or ""))
+                    self._conn.executemany("INSERT INTO identifiers (identifier, solution_id, occurrences) VALUES (?, ?, ?)",
+                                           [(name, solution_id, count) for name, count in code_identifiers(sol['code']).items()])
+                # Runs whose every solution was re-analysed since are fully superseded.
+                self._conn.execute("DELETE FROM runs WHERE contest_id = ? AND problem_index = ? AND mode = ? AND id != ? "
+                                   "AND NOT EXISTS (SELECT 1 FROM solutions WHERE run_id = runs.id)", (contest_id, problem_index, mode, run_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return run_id
+
+    def _remove_solution(self, contest_id: str, problem_index: str, mode: str, submission_id: str):
+        # A submission keeps one entry per problem and analysis mode; re-running an analysis replaces it instead of adding a copy.
+        stale = [(row[0],) for row in self._conn.execute(
+            "SELECT s.id FROM solutions s JOIN runs r ON r.id = s.run_id WHERE s.submission_id = ? AND r.contest_id = ? AND r.problem_index = ? AND r.mode = ?",
+            (submission_id, contest_id, problem_index, mode))]
+        self._conn.executemany("DELETE FROM solutions_fts WHERE rowid = ?", stale)
+        self._conn.executemany("DELETE FROM identifiers WHERE solution_id = ?", stale)
+        self._conn.executemany("DELETE FROM solutions WHERE id = ?", stale)
+
+    def search(self, text: str = "", syntax: str | None = None, identifier: str = "", limit: int = 50) -> list:
+        clauses, params = [], []
+        select = "s.id, s.run_id, s.submission_id, s.language, s.author, r.contest_id, r.problem_index, r.mode"
+        joins = "solutions s JOIN runs r ON r.id = s.run_id"
+        order = "r.created_at DESC"
+        if fts_query(text):
+            select += ", snippet(solutions_fts, -1, '**', '**', ' … ', 12)"
+            joins += " JOIN solutions_fts f ON f.rowid = s.id"
+            clauses.append("solutions_fts MATCH ?")
+            params.append(fts_query(text))
+            order = "bm25(solutions_fts)"
+        else:
+            select += ", NULL"
+        if syntax:
+            clauses.append("s.syntax = ?")
+            params.append(syntax)
+        if identifier.strip():
+            # A prefix range on the primary key keeps identifier lookups on the index.
+            prefix = identifier.strip().lower()
+            clauses.append("s.id IN (SELECT solution_id FROM identifiers WHERE identifier >= ? AND identifier < ?)")
+            params += [prefix, prefix + "\uffff"]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {select} FROM {joins} {where} ORDER BY {order} LIMIT ?", params + [limit]).fetchall()
+        keys = ('id', 'run_id', 'submission_id', 'language', 'author', 'contest_id', 'problem_index', 'mode', 'snippet')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def load_run(self, run_id: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs, solutions = self._conn.execute("SELECT (SELECT COUNT(*) FROM runs), (SELECT COUNT(*) FROM solutions)").fetchone()
+        return {"runs": runs, "solutions": solutions}
@@ -1,31 +1,137 @@
 # gemini_integration.py
 
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
 import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
 
-def get_gemini_response(prompt):
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        return model.generate_content(prompt).text
-    except Exception as e:
-        return f"An error occurred with the Gemini API: {e}"
+from config import (GEMINI_MODEL, LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, GEMINI_RETRIES, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX,
+                    GEMINI_MODEL_CACHE_SIZE, GLOBAL_GEMINI_CONCURRENCY, CHAT_SYSTEM_PROMPT, CHAT_SUMMARY_PROMPT, CHAT_SUMMARY_TOKENS)
+from cache_store import DiskCache
+from chat_memory import ChatMemory
+from concurrency import backoff_delay, get_concurrency_limit
+from prompt_packing import estimate_tokens
+from tracing import Tracer, span, use_tracer
+
+RETRYABLE_ERRORS = (api_exceptions.TooManyRequests, api_exceptions.ServiceUnavailable,
+                    api_exceptions.DeadlineExceeded, api_exceptions.InternalServerError)
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> DiskCache:
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = DiskCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES)
+        return _response_cache
+
+_models = OrderedDict()
+_models_lock = threading.Lock()
+
+def get_model(model_name=GEMINI_MODEL, system_instruction=None):
+    # Clients are reused across reruns and worker threads; chat models are keyed by their context, so keep only the newest few.
+    key = (model_name, system_instruction)
+    with _models_lock:
+        if key in _models:
+            _models.move_to_end(key)
+        else:
+            _models[key] = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+            while len(_models) > GEMINI_MODEL_CACHE_SIZE:
+                _models.popitem(last=False)
+        return _models[key]
+
+def make_response_key(model_name, prompt, generation_config=None):
+    payload = json.dumps({"model": model_name, "prompt": prompt, "generation_config": generation_config or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def request_gemini_response(prompt, use_cache=True, generation_config=None, model_name=GEMINI_MODEL, retries=GEMINI_RETRIES, on_chunk=None):
+    with span("get_gemini_response", model=model_name, prompt_chars=len(prompt), prompt_tokens=estimate_tokens(prompt),
+              streamed=on_chunk is not None, retries=0) as attributes:
+        result = _request_gemini_response(prompt, use_cache, generation_config, model_name, retries, on_chunk, attributes)
+        attributes.update(cached=result['cached'], retries=max(0, result['attempts'] - 1), response_chars=len(result['text'] or ""), error=result['error'])
+        return result
+
+def _request_gemini_response(prompt, use_cache, generation_config, model_name, retries, on_chunk, attributes):
+    key = make_response_key(model_name, prompt, generation_config)
+    if use_cache:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            if on_chunk:
+                on_chunk(cached)
+            return {'text': cached, 'error': None, 'attempts': 0, 'cached': True}
+    result = _generate_with_retry(lambda: get_model(model_name), prompt, generation_config, retries, on_chunk, attributes)
+    if use_cache and result['text']:
+        get_response_cache().set(key, result['text'])
+    return result
+
+def _generate_with_retry(make_model, contents, generation_config, retries, on_chunk, attributes):
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            model = make_model()
+            with get_concurrency_limit("gemini", GLOBAL_GEMINI_CONCURRENCY):
+                if on_chunk is None:
+                    text = model.generate_content(contents, generation_config=generation_config).text
+                else:
+                    text = ""
+                    for chunk in model.generate_content(contents, generation_config=generation_config, stream=True):
+                        if not text:
+                            attributes['first_chunk_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                        text += chunk.text
+                        on_chunk(text)
+            return {'text': text, 'error': None, 'attempts': attempt + 1, 'cached': False}
+        except RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                return {'text': None, 'error': f"{type(e).__name__}: {e}", 'attempts': attempt + 1, 'cached': False}
+            time.sleep(backoff_delay(attempt, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX))
+        except Exception as e:
+            return {'text': None, 'error': f"{type(e).__name__}: {e}", 'attempts': attempt + 1, 'cached': False}
 
 def initialize_chat(context):
-    initial_prompt = f"You are an expert competitive programming AI assistant. The user has a question regarding the following context. Your task is to answer their questions concisely and accurately.\n\n---CONTEXT---\n{context}\n---END CONTEXT---\n\nNow, please answer the user's question."
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    return model.start_chat(history=[{'role': 'user', 'parts': [initial_prompt]}, {'role': 'model', 'parts': ["Understood. I am ready to assist with this context. What is your question?"]}])
+    return ChatMemory(context)
+
+def summarize_chat(memory):
+    folded = memory.messages_to_fold()
+    if not folded:
+        return
+    messages = "\n\n".join(f"{message['role'].upper()}: {message['text']}" for message in folded)
+    with span("chat_summarize", messages=len(folded), prompt_tokens=estimate_tokens(messages)):
+        result = request_gemini_response(CHAT_SUMMARY_PROMPT.format(max_tokens=CHAT_SUMMARY_TOKENS, summary=memory.summary or "(none)", messages=messages))
+    # If summarizing fails, keep the user's questions so the window still shrinks and stays bounded.
+    summary = result['text'] or "\n".join([memory.summary] + [f"- {message['text']}" for message in folded if message['role'] == "user"])
+    memory.fold(summary, len(folded))
 
-def display_chat_interface(chat_key):
+def display_chat_interface(chat_key, trace=None):
     if f"chat_session_{chat_key}" not in st.session_state:
         st.error("Chat session not found.")
         return
-    for message in st.session_state[f"chat_session_{chat_key}"].history[2:]:
-        with st.chat_message(name=message.role, avatar="🧑‍💻" if message.role == "user" else "🤖"):
-            st.markdown(message.parts[0].text)
+    memory = st.session_state[f"chat_session_{chat_key}"]
+    for message in memory.messages:
+        with st.chat_message(name=message['role'], avatar="🧑‍💻" if message['role'] == "user" else "🤖"):
+            st.markdown(message['text'])
     if prompt := st.chat_input("Ask a follow-up question..."):
         with st.chat_message(name="user", avatar="🧑‍💻"):
             st.markdown(prompt)
-        with st.spinner("🤖 Thinking..."):
-            response = st.session_state[f"chat_session_{chat_key}"].send_message(prompt)
-            with st.chat_message(name="model", avatar="🤖"):
-                st.markdown(response.text)
\ No newline at end of file
+        with st.chat_message(name="model", avatar="🤖"):
+            placeholder = st.empty()
+            placeholder.markdown("🤖 Thinking...")
+            with use_tracer(Tracer(trace) if trace is not None else None):
+                contents = memory.contents(prompt)
+                with span("chat_send_message", chat_key=str(chat_key), prompt_chars=len(prompt), history_messages=len(contents) - 1,
+                          history_tokens=sum(estimate_tokens(content['parts'][0]) for content in contents), retries=0) as attributes:
+                    result = _generate_with_retry(lambda: get_model(GEMINI_MODEL, CHAT_SYSTEM_PROMPT.format(context=memory.context)), contents,
+                                                  None, GEMINI_RETRIES, lambda text: placeholder.markdown(text + " ▌"), attributes)
+                    attributes.update(retries=max(0, result['attempts'] - 1), response_chars=len(result['text'] or ""), error=result['error'])
+                if result['error']:
+                    # A failed reply is not part of the conversation, so the user can simply ask again.
+                    placeholder.empty()
+                    st.error(f"Chat failed: {result['error']}")
+                    return
+                placeholder.markdown(result['text'])
+                memory.add_exchange(prompt, result['text'])
+                summarize_chat(memory)
@@ -0,0 +1,107 @@
+# job_service.py
+
+import copy
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOB_WORKERS
+from analysis_pipeline import run_pipeline
+
+# Settings that change how a run fetches, not what it produces, so they do not split otherwise identical requests.
+# The cache flags are kept in the key: a session that opted out of caches must not be served by a job that uses them.
+COALESCE_IGNORED_PARAMS = ("backend", "sleep_time", "save_to_corpus")
+
+def coalesce_key(params) -> str:
+    relevant = {key: value for key, value in params.items() if key not in COALESCE_IGNORED_PARAMS}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()
+
+class Job:
+    def __init__(self, key: str, params: dict):
+        self.key = key
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.subscribers = 0
+        self._events = []
+        self._latest_chunk = {}
+        self._changed = threading.Condition()
+
+    def publish(self, event):
+        with self._changed:
+            if event['type'] == 'chunk':
+                # Chunks carry the full text so far, so late subscribers only need the newest one per key.
+                if event['key'] in self._latest_chunk:
+                    self._events[self._latest_chunk[event['key']]] = None
+                self._latest_chunk[event['key']] = len(self._events)
+            self._events.append(event)
+            self._changed.notify_all()
+
+    def finish(self, status, result=None, error=None):
+        with self._changed:
+            self.status, self.result, self.error = status, result, error
+            self._changed.notify_all()
+
+    def events_since(self, cursor: int, timeout: float) -> tuple:
+        with self._changed:
+            if cursor >= len(self._events) and self.status in ("queued", "running"):
+                self._changed.wait(timeout)
+            events = [event for event in self._events[cursor:] if event is not None]
+            return events, len(self._events), self.status in ("done", "failed")
+
+    def outcome(self) -> dict:
+        if self.error is not None:
+            raise self.error
+        # Each session gets its own copy, since chats append spans to the results they were given.
+        return copy.deepcopy(self.result)
+
+class JobService:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queue = []
+
+    def submit(self, params) -> Job:
+        key = coalesce_key(params)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = Job(key, params)
+                self._queue.append(job)
+                self._executor.submit(self._run, job)
+            job.subscribers += 1
+        return job
+
+    def release(self, job: Job):
+        with self._lock:
+            job.subscribers -= 1
+
+    def position(self, job: Job) -> int | None:
+        with self._lock:
+            return self._queue.index(job) + 1 if job in self._queue else None
+
+    def _run(self, job: Job):
+        with self._lock:
+            self._queue.remove(job)
+            job.status = "running"
+        try:
+            job.finish("done", result=run_pipeline(job.params, job.publish))
+        except Exception as e:
+            job.finish("failed", error=e)
+        finally:
+            # Finished jobs stop coalescing; a later identical request reruns and is served mostly from the caches.
+            with self._lock:
+                self._jobs.pop(job.key, None)
+
+_job_service = None
+_job_service_lock = threading.Lock()
+
+def get_job_service() -> JobService:
+    global _job_service
+    with _job_service_lock:
+        if _job_service is None:
+            _job_service = JobService()
+        return _job_service
@@ -6,10 +6,8 @@ import os
 import google.generativeai as genai
 import streamlit.components.v1 as components
 
-from config import LANGUAGE_OPTIONS
-from ui_components import apply_styling, render_sidebar, render_results_area
-from scraping_logic import fetch_problem_statement, extract_submission_ids, get_code_from_submission
-from gemini_integration import get_gemini_response
+from ui_components import apply_styling, render_sidebar, render_results_area, run_pipeline_live, render_batch_loader, render_corpus_search
+from analysis_pipeline import PipelineError, build_params
 
 def main():
     st.set_page_config(page_title="Codeforces AI Analyst", layout="wide", initial_sidebar_state="expanded")
@@ -22,7 +20,7 @@ def main():
     if 'run_collapse_script' not in st.session_state: st.session_state.run_collapse_script = False
 
     configs = render_sidebar()
-    analysis_mode, contest_id, problem_index, language_name, n, sleep_time, max_chars, single_prompt, comp_prompt, all_together_prompt = configs
+    analysis_mode, contest_id, problem_index, language_name, n, backend, sleep_time, max_chars, token_budget, use_cache, use_llm_cache, distinct, single_prompt, comp_prompt, all_together_prompt = configs
 
     if st.sidebar.button("Analyze Solutions", use_container_width=True):
         st.session_state.analysis_complete = False
@@ -38,53 +36,27 @@ def main():
         else:
             try:
                 genai.configure(api_key=gemini_api_key)
-                with st.spinner("Phase 1/3: Fetching Problem & Submissions..."):
-                    ps = fetch_problem_statement(contest_id, problem_index, sleep_time)
-                    if not ps:
-                        st.session_state.error_message = "Could not fetch Problem Statement. Please check inputs or increase wait time."; st.rerun()
-                    
-                    sub_ids = extract_submission_ids(contest_id, problem_index, LANGUAGE_OPTIONS.index(language_name), sleep_time)
-                    if not sub_ids:
-                        st.session_state.error_message = "No submissions found for the selected criteria."; st.rerun()
-
-                all_solutions_code = []
-                with st.spinner(f"Phase 2/3: Fetching code for {len(sub_ids[:n])} solutions..."):
-                    for i, sub_id in enumerate(sub_ids[:n]):
-                        code = get_code_from_submission(contest_id, sub_id, sleep_time)
-                        if code:
-                            all_solutions_code.append({'id': sub_id, 'code': code})
-                
-                if not all_solutions_code:
-                    st.session_state.error_message = "Successfully found submission IDs, but failed to scrape the code for any of them. This might be due to a Codeforces UI update or network issues."; st.rerun()
-
-                st.session_state.results = {'problem_statement': ps, 'solutions': all_solutions_code, 'mode': analysis_mode, 'language': language_name}
-
-                with st.spinner("Phase 3/3: Calling Gemini for Analysis..."):
-                    if analysis_mode == "One by One":
-                        for sol in st.session_state.results['solutions']:
-                            prompt = single_prompt.format(problem_statement=ps, language=language_name, code=sol['code'][:max_chars])
-                            sol['analysis'] = get_gemini_response(prompt)
-                        if len(st.session_state.results['solutions']) > 1:
-                            solutions_text = "\n".join([f"--- Solution #{i+1} (ID: {s['id']})\n```{s['code'][:max_chars]}```" for i, s in enumerate(st.session_state.results['solutions'])])
-                            prompt = comp_prompt.format(problem_statement=ps, solutions=solutions_text)
-                            st.session_state.results['comparison'] = get_gemini_response(prompt)
-                    elif analysis_mode == "All Together":
-                        solutions_text = "\n".join([f"--- Solution #{i+1} (ID: {s['id']})\n```{s['code'][:max_chars]}```" for i, s in enumerate(st.session_state.results['solutions'])])
-                        prompt = all_together_prompt.format(problem_statement=ps, solutions=solutions_text)
-                        st.session_state.results['combined_analysis'] = get_gemini_response(prompt)
-                
+                params = build_params(analysis_mode=analysis_mode, contest_id=contest_id, problem_index=problem_index, language_name=language_name,
+                                      n=n, backend=backend, sleep_time=sleep_time, max_chars=max_chars, token_budget=token_budget,
+                                      use_cache=use_cache, use_llm_cache=use_llm_cache, distinct=distinct, single_prompt=single_prompt,
+                                      comp_prompt=comp_prompt, all_together_prompt=all_together_prompt)
+                st.session_state.results = run_pipeline_live(params)
                 st.session_state.analysis_complete = True
                 st.session_state.run_collapse_script = True
+            except PipelineError as e:
+                st.session_state.error_message = str(e)
             except Exception as e:
                 st.session_state.error_message = f"An unexpected error occurred: {e}"
                 st.session_state.analysis_complete = False
                 st.session_state.run_collapse_script = False
         st.rerun()
 
+    render_batch_loader()
+    render_corpus_search()
     st.markdown("<h1 style='text-align: center;'>Codeforces AI Analyst</h1>", unsafe_allow_html=True)
     
     if st.session_state.analysis_complete:
-        render_results_area(st.session_state.results, language_name, max_chars)
+        render_results_area(st.session_state.results, st.session_state.results.get('language', language_name), max_chars)
     elif st.session_state.error_message:
         st.sidebar.error(st.session_state.error_message)
     else:
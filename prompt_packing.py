@@ -0,0 +1,174 @@
+# prompt_packing.py
+
+import math
+import re
+
+from config import STATEMENT_TOKEN_SHARE
+
+C_LIKE_SYNTAXES = {"cpp", "java", "csharp", "go", "javascript", "rust", "php"}
+TRUNCATION_MARKER = "\n... [truncated]"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_PYTHON_LEXEMES = re.compile(r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|#[^\n]*')
+_C_LIKE_LEXEMES = re.compile(r'//[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.[^\'\n]*|[^\'\\\n])\'|`[^`]*`')
+_PHP_LEXEMES = re.compile(r'//[^\n]*|#[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'')
+_SYNTAX_HINTS = [
+    ("php", re.compile(r"<\?php")),
+    ("cpp", re.compile(r"#include\s*<|\bstd::|\busing namespace std\b")),
+    ("rust", re.compile(r"\bfn main\s*\(|\blet mut\b")),
+    ("go", re.compile(r"^package main\b", re.M)),
+    ("csharp", re.compile(r"\busing System\b|\bConsole\.")),
+    ("java", re.compile(r"\bpublic static void main\b|\bimport java\.")),
+    ("javascript", re.compile(r"\bconsole\.log\b|\brequire\(|=>")),
+    ("python", re.compile(r"^\s*(def|import|from)\b|\binput\(\)|\bprint\(", re.M)),
+]
+
+def estimate_tokens(text: str) -> int:
+    return sum(1 + len(token) // 8 for token in _TOKEN_PATTERN.findall(text))
+
+def detect_syntax(code: str) -> str:
+    for syntax, pattern in _SYNTAX_HINTS:
+        if pattern.search(code):
+            return syntax
+    return "text"
+
+def strip_comments(code: str, syntax: str) -> str:
+    if syntax == "python":
+        pattern, comment_starts = _PYTHON_LEXEMES, ("#",)
+    elif syntax == "php":
+        pattern, comment_starts = _PHP_LEXEMES, ("//", "#", "/*")
+    elif syntax in C_LIKE_SYNTAXES:
+        pattern, comment_starts = _C_LIKE_LEXEMES, ("//", "/*")
+    else:
+        return code
+    def replace(match):
+        lexeme = match.group(0)
+        if lexeme.startswith(comment_starts):
+            return "\n" * lexeme.count("\n") if lexeme.startswith("/*") else ""
+        return lexeme
+    return pattern.sub(replace, code)
+
+def _block_end(code: str, open_brace: int) -> int:
+    depth = 0
+    for i in range(open_brace, len(code)):
+        if code[i] == "{":
+            depth += 1
+        elif code[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(code)
+
+def _is_referenced(code: str, name: str, start: int, end: int) -> bool:
+    return re.search(rf"\b{re.escape(name)}\b", code[:start] + code[end:]) is not None
+
+def _brace_depths(code: str) -> list:
+    # Depth before each character, ignoring braces inside string and character literals.
+    masked = _C_LIKE_LEXEMES.sub(lambda match: " " * len(match.group(0)), code)
+    depths, depth = [], 0
+    for char in masked:
+        depths.append(depth)
+        depth += (char == "{") - (char == "}")
+    depths.append(depth)
+    return depths
+
+def _cpp_definitions(code: str):
+    for match in re.finditer(r"^[ \t]*#define[ \t]+(\w+)(?:.*\\\n)*.*\n?", code, re.M):
+        yield match.group(1), match.start(), match.end()
+    for match in re.finditer(r"^[ \t]*(?:typedef\b[^;{]*?\b(\w+)\s*;|using\s+(\w+)\s*=[^;]*;)[ \t]*\n?", code, re.M):
+        yield match.group(1) or match.group(2), match.start(), match.end()
+    # Only free functions are candidates: members (e.g. a comparator's operator()) are used through their type, not their name.
+    depths = _brace_depths(code)
+    for match in re.finditer(r"^(?:template\s*<[^>]*>\s*)?[\w:<>,*&\s]*?\b(\w+)\s*\([^;{}]*\)\s*(?:const\s*)?\{", code, re.M):
+        if match.group(1) not in ("main", "operator", "if", "for", "while", "switch", "catch") and depths[match.start(1)] == 0:
+            yield match.group(1), match.start(), _block_end(code, match.end() - 1)
+
+def _python_definitions(code: str):
+    # Decorators belong to the definition below them; leaving one behind would attach it to the next definition.
+    for match in re.finditer(r"^(?:@[^\n]*\n)*(?:async\s+)?(?:def|class)\s+(\w+)[^\n]*\n(?:(?:[ \t]+[^\n]*|[ \t]*)\n?)*", code, re.M):
+        if match.group(1) != "main":
+            yield match.group(1), match.start(), match.end()
+
+def remove_unused_definitions(code: str, syntax: str) -> str:
+    if syntax == "cpp":
+        find_definitions = _cpp_definitions
+    elif syntax == "python":
+        find_definitions = _python_definitions
+    else:
+        return code
+    # Removing one helper can leave others unused, so repeat until nothing changes.
+    while True:
+        for name, start, end in find_definitions(code):
+            if not _is_referenced(code, name, start, end):
+                code = code[:start] + code[end:]
+                break
+        else:
+            return code
+
+def collapse_whitespace(text: str) -> str:
+    lines = [line.rstrip().expandtabs(4) for line in text.splitlines() if line.strip()]
+    indents = [len(line) - len(line.lstrip(" ")) for line in lines]
+    unit = math.gcd(*indents) if any(indents) else 1
+    return "\n".join(" " * (indent // unit) + line.lstrip(" ") for line, indent in zip(lines, indents))
+
+def compact_code(code: str, syntax: str) -> str:
+    if syntax not in C_LIKE_SYNTAXES and syntax != "python":
+        syntax = detect_syntax(code)
+    return collapse_whitespace(remove_unused_definitions(strip_comments(code, syntax), syntax))
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], estimate_tokens(TRUNCATION_MARKER)
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            # Spend what is left inside the line that does not fit, so minified code (everything on one line) still fills the budget.
+            end = 0
+            for match in _TOKEN_PATTERN.finditer(line):
+                used += 1 + len(match.group(0)) // 8
+                if used > budget:
+                    break
+                end = match.end()
+            if end:
+                kept.append(line[:end])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + TRUNCATION_MARKER
+
+def truncate_to_chars(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars] + TRUNCATION_MARKER
+
+def allocate_budget(sizes: list, budget: int) -> list:
+    allocation = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(sizes) - position)
+        allocation[i] = min(sizes[i], share)
+        remaining -= allocation[i]
+    return allocation
+
+def pack_prompt_inputs(problem_statement: str, codes: list, syntax: str, token_budget: int | None = None,
+                       max_chars: int | None = None, statement_share: float = STATEMENT_TOKEN_SHARE) -> dict:
+    original_tokens = estimate_tokens(problem_statement) + sum(estimate_tokens(code) for code in codes)
+    statement = collapse_whitespace(problem_statement)
+    packed_codes = [compact_code(code, syntax) for code in codes]
+    if max_chars:
+        packed_codes = [truncate_to_chars(code, max_chars) for code in packed_codes]
+    if token_budget:
+        statement_tokens = estimate_tokens(statement)
+        code_allocation = allocate_budget([estimate_tokens(code) for code in packed_codes],
+                                          token_budget - min(statement_tokens, int(token_budget * statement_share)))
+        packed_codes = [truncate_to_tokens(code, budget) for code, budget in zip(packed_codes, code_allocation)]
+        statement = truncate_to_tokens(statement, token_budget - sum(code_allocation))
+    packed_tokens = estimate_tokens(statement) + sum(estimate_tokens(code) for code in packed_codes)
+    return {
+        'problem_statement': statement,
+        'codes': packed_codes,
+        'stats': {'original_tokens': original_tokens, 'packed_tokens': packed_tokens, 'saved_tokens': original_tokens - packed_tokens},
+    }
\ No newline at end of file
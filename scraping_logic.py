@@ -1,17 +1,280 @@
-import pyautogui
-import pyperclip
+import os
 import time
 import webbrowser
 import re
+import threading
+from itertools import islice
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
 
-def fetch_problem_statement(contest_id: str, problem_index: str, sleep_time: int) -> str | None:
-    url = f"https://codeforces.com/contest/{contest_id}/problem/{problem_index}"
+from config import (CODEFORCES_BASE_URL, HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_USER_AGENT, LANGUAGE_OPTIONS,
+                    FETCH_WORKERS, FETCH_RATE_PER_HOST, FETCH_BURST, FETCH_RETRIES, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX,
+                    SCRAPE_CACHE_PATH, SCRAPE_CACHE_MAX_BYTES, STATUS_CACHE_TTL, DEFAULT_SUBMISSION_LIMIT, MAX_STATUS_PAGES,
+                    GLOBAL_FETCH_CONCURRENCY)
+from concurrency import get_concurrency_limit, get_rate_limiter, retry_with_backoff
+from cache_store import DiskCache, make_key
+from tracing import span
+
+# Client errors that can clear up on their own; any other 4xx (403, 404, ...) will not change on a retry.
+TRANSIENT_CLIENT_ERRORS = (408, 425, 429)
+
+class PermanentFetchError(Exception):
+    def __init__(self, path: str, status_code: int):
+        super().__init__(f"{path} returned HTTP {status_code}")
+        self.path = path
+        self.status_code = status_code
+
+_http_session = None
+_http_session_lock = threading.Lock()
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+def get_scrape_cache() -> DiskCache:
+    global _scrape_cache
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            _scrape_cache = DiskCache(SCRAPE_CACHE_PATH, SCRAPE_CACHE_MAX_BYTES)
+        return _scrape_cache
+
+def _cached(key: str, fetch, use_cache: bool, ttl: float | None = None, attributes: dict | None = None):
+    if not use_cache:
+        return fetch()
+    cache = get_scrape_cache()
+    value = cache.get(key)
+    if attributes is not None:
+        attributes['cache_hit'] = value is not None
+    if value is None:
+        value = fetch()
+        if value:
+            cache.set(key, value, ttl)
+    return value
+
+def _new_http_session(adapter: HTTPAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": HTTP_USER_AGENT})
+    return session
+
+def get_http_session() -> requests.Session:
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = _new_http_session(HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+        return _http_session
+
+def get_base_url() -> str:
+    return os.getenv("CODEFORCES_BASE_URL", CODEFORCES_BASE_URL).rstrip("/")
+
+def fetch_html(path: str, session: requests.Session | None = None, data: dict | None = None, raise_permanent: bool = False) -> str | None:
+    url = f"{get_base_url()}{path}"
+    with span("http_request", method="GET" if data is None else "POST", path=path) as attributes:
+        waited = time.perf_counter()
+        get_rate_limiter(urlparse(url).netloc, FETCH_RATE_PER_HOST, FETCH_BURST).acquire()
+        attributes['rate_limit_wait_ms'] = round((time.perf_counter() - waited) * 1000, 1)
+        session = session or get_http_session()
+        try:
+            with get_concurrency_limit("fetch", GLOBAL_FETCH_CONCURRENCY):
+                if data is None:
+                    response = session.get(url, timeout=HTTP_TIMEOUT)
+                else:
+                    response = session.post(url, data=data, timeout=HTTP_TIMEOUT)
+            attributes['status_code'] = response.status_code
+            attributes['bytes'] = len(response.content)
+            if raise_permanent and 400 <= response.status_code < 500 and response.status_code not in TRANSIENT_CLIENT_ERRORS:
+                attributes['error'] = f"HTTP {response.status_code}"
+                raise PermanentFetchError(path, response.status_code)
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException as e:
+            attributes['error'] = f"{type(e).__name__}: {e}"
+            return None
+
+def parse_problem_statement(html: str) -> str | None:
+    statement = BeautifulSoup(html, "html.parser").select_one("div.problem-statement")
+    if statement is None:
+        return None
+    return statement.get_text("\n", strip=True) or None
+
+def _parse_quantity(text: str) -> int | None:
+    match = re.match(r"\d+", text.replace("\xa0", " ").strip())
+    return int(match.group(0)) if match else None
+
+def parse_status_rows(html: str) -> list:
+    soup = BeautifulSoup(html, "html.parser")
+    submissions = []
+    for row in soup.select("table.status-frame-datatable tr[data-submission-id]"):
+        cells = row.find_all("td")
+        if len(cells) < 8:
+            continue
+        problem_link = cells[3].find("a", href=True)
+        verdict_wrapper = row.select_one("[submissionverdict]")
+        submissions.append({
+            'id': row["data-submission-id"],
+            'author': cells[2].get_text(strip=True),
+            'problem': problem_link["href"].rstrip("/").rsplit("/", 1)[-1].upper() if problem_link else None,
+            'language': cells[4].get_text(strip=True),
+            'verdict': verdict_wrapper["submissionverdict"] if verdict_wrapper else ("OK" if row.select_one(".verdict-accepted") else None),
+            'time_ms': _parse_quantity(cells[6].get_text()),
+            'memory_kb': _parse_quantity(cells[7].get_text()),
+        })
+    return submissions
+
+def submission_matches(submission: dict, problem_letter: str | None = None, language_name: str | None = None, verdict: str | None = "OK") -> bool:
+    if problem_letter and submission['problem'] and submission['problem'] != problem_letter.upper():
+        return False
+    if language_name and submission['language'] != language_name:
+        return False
+    return not verdict or submission['verdict'] == verdict
+
+def parse_submission_rows(html: str, problem_letter: str | None = None, language_name: str | None = None, verdict: str | None = "OK") -> list:
+    return [submission for submission in parse_status_rows(html) if submission_matches(submission, problem_letter, language_name, verdict)]
+
+def _status_page_count(html: str) -> int:
+    pages = [int(span["pageindex"]) for span in BeautifulSoup(html, "html.parser").select(".pagination span.page-index[pageindex]")]
+    return max(pages, default=1)
+
+def _apply_status_filter(session: requests.Session, contest_id: str, problem_letter: str, language_name: str | None, verdict: str | None) -> bool:
+    with span("apply_status_filter", contest_id=contest_id, problem_index=problem_letter, language=language_name, applied=False) as attributes:
+        html = fetch_html(f"/contest/{contest_id}/status", session)
+        if not html:
+            attributes['reason'] = "status page unavailable"
+            return False
+        soup = BeautifulSoup(html, "html.parser")
+        csrf = soup.select_one("input[name=csrf_token]") or soup.select_one("meta[name=X-Csrf-Token]")
+        if csrf is None:
+            attributes['reason'] = "csrf token not found"
+            return False
+        program_type = "anyProgramTypeForInvoker"
+        if language_name:
+            option = next((o for o in soup.select("select[name=programTypeForInvoker] option") if o.get_text(strip=True) == language_name), None)
+            if option is None:
+                attributes['reason'] = "language option not found"
+            else:
+                program_type = option["value"]
+        form = {
+            "csrf_token": csrf.get("value") or csrf.get("content"),
+            "action": "setupSubmissionFilter",
+            "frameProblemIndex": problem_letter.upper(),
+            "verdictName": verdict or "anyVerdict",
+            "programTypeForInvoker": program_type,
+            "comparisonType": "NOT_USED",
+            "judgedTestCount": "",
+            "participantSubstring": "",
+        }
+        if fetch_html(f"/contest/{contest_id}/status", session, data=form) is None:
+            attributes['reason'] = "filter request failed"
+            return False
+        attributes['applied'] = 'reason' not in attributes
+        return attributes['applied']
+
+def iter_submissions(contest_id: str, problem_letter: str, language_name: str | None = None, verdict: str | None = "OK",
+                     max_pages: int = MAX_STATUS_PAGES):
+    # The status filter lives in the server-side session, so each walk gets its own cookie jar on the shared pool.
+    session = _new_http_session(get_http_session().get_adapter(get_base_url()))
+    _apply_status_filter(session, contest_id, problem_letter, language_name, verdict)
+    seen = set()
+    page = 1
+    last_page = 1
+    while page <= min(last_page, max_pages):
+        html = fetch_html(f"/contest/{contest_id}/status/{problem_letter.upper()}/page/{page}?order=BY_CONSUMED_TIME_ASC", session)
+        if not html:
+            return
+        last_page = _status_page_count(html)
+        # If the server-side filter did not apply, most rows may not match; the walk must only end on pages that
+        # repeat earlier rows (Codeforces serves the last page again past the end), not on pages without a match.
+        unseen = [submission for submission in parse_status_rows(html) if submission['id'] not in seen]
+        seen.update(submission['id'] for submission in unseen)
+        for submission in unseen:
+            if submission_matches(submission, problem_letter, language_name, verdict):
+                yield submission
+        if not unseen and page > 1:
+            return
+        page += 1
+
+def parse_submission_code(html: str) -> str | None:
+    source = BeautifulSoup(html, "html.parser").select_one("pre#program-source-text")
+    if source is None:
+        return None
+    return source.get_text().strip() or None
+
+def parse_contest_problems(html: str) -> list:
+    cells = BeautifulSoup(html, "html.parser").select("table.problems td.id a")
+    return list(dict.fromkeys(cell.get_text(strip=True) for cell in cells if cell.get_text(strip=True)))
+
+def list_contest_problems(contest_id: str, use_cache: bool = True) -> list:
+    def fetch():
+        html = fetch_html(f"/contest/{contest_id}")
+        return parse_contest_problems(html) if html else []
+    return _cached(make_key("problems", contest_id), fetch, use_cache) or []
+
+def fetch_problem_statement(contest_id: str, problem_index: str, sleep_time: int, backend: str = "HTTP", use_cache: bool = True) -> str | None:
+    def fetch():
+        if backend == "Browser":
+            return _fetch_problem_statement_browser(contest_id, problem_index, sleep_time)
+        html = fetch_html(f"/contest/{contest_id}/problem/{problem_index}")
+        return parse_problem_statement(html) if html else None
+    with span("fetch_problem_statement", contest_id=contest_id, problem_index=problem_index, backend=backend) as attributes:
+        statement = _cached(make_key("statement", contest_id, problem_index.upper()), fetch, use_cache, attributes=attributes)
+        attributes['chars'] = len(statement or "")
+        return statement
+
+def list_submissions(contest_id: str, problem_letter: str, lang_index: int, sleep_time: int, backend: str = "HTTP",
+                     use_cache: bool = True, limit: int = DEFAULT_SUBMISSION_LIMIT) -> list:
+    def fetch():
+        if backend == "Browser":
+            return [{'id': submission_id} for submission_id in _extract_submission_ids_browser(contest_id, problem_letter, lang_index, sleep_time)[:limit]]
+        language_name = LANGUAGE_OPTIONS[lang_index] if lang_index > 0 else None
+        return list(islice(iter_submissions(contest_id, problem_letter, language_name), limit))
+    with span("extract_submission_ids", contest_id=contest_id, problem_index=problem_letter, backend=backend, limit=limit) as attributes:
+        submissions = _cached(make_key("status", contest_id, problem_letter.upper(), lang_index, limit), fetch, use_cache, STATUS_CACHE_TTL, attributes) or []
+        attributes['count'] = len(submissions)
+        return submissions
+
+def get_code_from_submission(contest_id: str, submission_id: str, sleep_time: int, backend: str = "HTTP", use_cache: bool = True) -> str | None:
+    def fetch():
+        if backend == "Browser":
+            return _get_code_from_submission_browser(contest_id, submission_id, sleep_time)
+        html = fetch_html(f"/contest/{contest_id}/submission/{submission_id}", raise_permanent=True)
+        return parse_submission_code(html) if html else None
+    with span("get_code_from_submission", contest_id=contest_id, submission_id=submission_id, backend=backend) as attributes:
+        code = _cached(make_key("submission", contest_id, submission_id), fetch, use_cache, attributes=attributes)
+        attributes['chars'] = len(code or "")
+        return code
+
+def get_code_with_retry(contest_id: str, submission_id: str, sleep_time: int, backend: str = "HTTP", use_cache: bool = True) -> str | None:
+    with span("fetch_submission_code", submission_id=submission_id, retries=0) as attributes:
+        def attempt():
+            attributes['attempts'] = attributes.get('attempts', 0) + 1
+            return get_code_from_submission(contest_id, submission_id, sleep_time, backend, use_cache)
+        # Only network errors, 5xx/429 responses and pages without a source are retried; a 403 or 404 stays that way.
+        try:
+            code = retry_with_backoff(attempt, FETCH_RETRIES, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX)
+        except PermanentFetchError as e:
+            attributes['status_code'] = e.status_code
+            code = None
+        attributes['retries'] = attributes['attempts'] - 1
+        attributes['ok'] = bool(code)
+        return code
+
+def fetch_worker_count(backend: str, max_workers: int = FETCH_WORKERS) -> int:
+    # The browser backend shares one clipboard and one focused tab, so it can only fetch serially.
+    return 1 if backend == "Browser" else max_workers
+
+def _fetch_problem_statement_browser(contest_id: str, problem_index: str, sleep_time: int) -> str | None:
+    import pyautogui
+    import pyperclip
+    url = f"{get_base_url()}/contest/{contest_id}/problem/{problem_index}"
     webbrowser.open(url)
-    time.sleep(sleep_time)
-    def wait_until_problem_ready(timeout=10, interval=0.2):
+    with span("browser_sleep", seconds=sleep_time):
+        time.sleep(sleep_time)
+    def wait_until_problem_ready(attributes, timeout=10, interval=0.2):
         previous_text = ""
         start_time = time.time()
         while time.time() - start_time < timeout:
+            attributes['polls'] = attributes.get('polls', 0) + 1
             pyautogui.hotkey("ctrl", "a")
             pyautogui.hotkey("ctrl", "c")
             current_text = pyperclip.paste()
@@ -20,7 +283,9 @@ def fetch_problem_statement(contest_id: str, problem_index: str, sleep_time: int
             previous_text = current_text
             time.sleep(interval)
         return ""
-    raw_clipboard = wait_until_problem_ready()
+    with span("wait_until_problem_ready") as attributes:
+        raw_clipboard = wait_until_problem_ready(attributes)
+        attributes['chars'] = len(raw_clipboard)
     pyautogui.hotkey("ctrl", "w")
     if not raw_clipboard:
         return None
@@ -32,10 +297,13 @@ def fetch_problem_statement(contest_id: str, problem_index: str, sleep_time: int
         return None
     return raw_clipboard[start + len(start_marker):end].strip()
 
-def extract_submission_ids(contest_id: str, problem_letter: str, lang_index: int, sleep_time: int) -> list:
-    url = f"https://codeforces.com/contest/{contest_id}/status?order=BY_CONSUMED_TIME_ASC"
+def _extract_submission_ids_browser(contest_id: str, problem_letter: str, lang_index: int, sleep_time: int) -> list:
+    import pyautogui
+    import pyperclip
+    url = f"{get_base_url()}/contest/{contest_id}/status?order=BY_CONSUMED_TIME_ASC"
     webbrowser.open(url)
-    time.sleep(sleep_time)
+    with span("browser_sleep", seconds=sleep_time):
+        time.sleep(sleep_time)
     pyautogui.hotkey("ctrl", "f")
     pyperclip.copy("Status Filter")
     pyautogui.hotkey("ctrl", "v")
@@ -50,7 +318,8 @@ def extract_submission_ids(contest_id: str, problem_letter: str, lang_index: int
         pyautogui.press("right", presses=lang_index)
     pyautogui.press("tab", presses=4)
     pyautogui.press("enter")
-    time.sleep(sleep_time)
+    with span("browser_sleep", seconds=sleep_time):
+        time.sleep(sleep_time)
     pyautogui.hotkey("ctrl", "a")
     pyautogui.hotkey("ctrl", "c")
     pyautogui.hotkey("ctrl", "w")
@@ -61,14 +330,18 @@ def extract_submission_ids(contest_id: str, problem_letter: str, lang_index: int
     submission_ids = re.findall(r'(?<=\n)(\d{9})(?=\s)', content)
     return list(dict.fromkeys(submission_ids))
 
-def get_code_from_submission(contest_id: str, submission_id: str, sleep_time: int) -> str | None:
-    url = f"https://codeforces.com/contest/{contest_id}/submission/{submission_id}"
+def _get_code_from_submission_browser(contest_id: str, submission_id: str, sleep_time: int) -> str | None:
+    import pyautogui
+    import pyperclip
+    url = f"{get_base_url()}/contest/{contest_id}/submission/{submission_id}"
     webbrowser.open(url)
-    time.sleep(sleep_time)
-    def wait_until_code_ready(timeout=8, interval=0.1):
+    with span("browser_sleep", seconds=sleep_time):
+        time.sleep(sleep_time)
+    def wait_until_code_ready(attributes, timeout=8, interval=0.1):
         previous_text = ""
         start_time = time.time()
         while time.time() - start_time < timeout:
+            attributes['polls'] = attributes.get('polls', 0) + 1
             pyautogui.hotkey("ctrl", "a")
             pyautogui.hotkey("ctrl", "c")
             current_text = pyperclip.paste()
@@ -77,7 +350,9 @@ def get_code_from_submission(contest_id: str, submission_id: str, sleep_time: in
             previous_text = current_text
             time.sleep(interval)
         return ""
-    clipboard_text = wait_until_code_ready()
+    with span("wait_until_code_ready") as attributes:
+        clipboard_text = wait_until_code_ready(attributes)
+        attributes['chars'] = len(clipboard_text)
     pyautogui.hotkey("ctrl", "w")
     if not clipboard_text:
         return None
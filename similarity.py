@@ -0,0 +1,82 @@
+# similarity.py
+
+import re
+import zlib
+import numpy as np
+
+from config import SHINGLE_SIZE, MINHASH_PERMUTATIONS, LSH_BANDS, NEAR_DUPLICATE_THRESHOLD
+from prompt_packing import compact_code
+
+KEYWORDS = {
+    "auto", "bool", "break", "case", "catch", "char", "class", "const", "continue", "def", "default", "del", "do", "double",
+    "elif", "else", "enum", "except", "false", "False", "final", "finally", "float", "fn", "for", "from", "func", "global",
+    "if", "impl", "import", "in", "int", "is", "lambda", "let", "long", "loop", "match", "mut", "new", "None", "not", "null",
+    "or", "and", "package", "pass", "private", "public", "return", "short", "signed", "static", "string", "String", "struct",
+    "switch", "template", "this", "throw", "true", "True", "try", "typedef", "typename", "unsigned", "using", "var", "vector",
+    "void", "while", "with", "yield",
+}
+
+_CODE_TOKENS = re.compile(r"[A-Za-z_]\w*|\d+(?:\.\d+)?|\S")
+_MERSENNE_61 = (1 << 61) - 1
+
+def normalize_tokens(code: str, syntax: str) -> list:
+    # Local names are renamed away so that copies of a template still match; calls and member names carry the approach.
+    tokens = _CODE_TOKENS.findall(compact_code(code, syntax))
+    normalized = []
+    for i, token in enumerate(tokens):
+        if token[0].isdigit():
+            normalized.append("0")
+        elif (token[0].isalpha() or token[0] == "_") and token not in KEYWORDS:
+            is_call = i + 1 < len(tokens) and tokens[i + 1] == "("
+            is_member = i > 0 and tokens[i - 1] in (".", "::", ":")
+            normalized.append(token if is_call or is_member else "v")
+        else:
+            normalized.append(token)
+    return normalized
+
+def shingle_hashes(tokens: list, size: int = SHINGLE_SIZE) -> np.ndarray:
+    token_hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in tokens] or [0], dtype=np.uint64)
+    if len(token_hashes) < size:
+        return np.unique(token_hashes)
+    count = len(token_hashes) - size + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        shingles = shingles * np.uint64(1_000_003) + token_hashes[offset:offset + count]
+    return np.unique(shingles)
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm: int = MINHASH_PERMUTATIONS, bands: int = LSH_BANDS, threshold: float = NEAR_DUPLICATE_THRESHOLD, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_61, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, _MERSENNE_61, num_perm, dtype=np.uint64)
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.threshold = threshold
+        self.signatures = np.empty((0, num_perm), dtype=np.uint64)
+        self.clusters = []
+        self.cluster_count = 0
+        self.buckets = [{} for _ in range(bands)]
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        # All permutations at once: one (num_perm, shingles) matrix, reduced with a column-wise min.
+        hashed = (self.a[:, None] * (shingles[None, :] & np.uint64(_MERSENNE_61)) + self.b[:, None]) >> np.uint64(3)
+        return hashed.min(axis=1)
+
+    def add(self, tokens: list) -> tuple:
+        signature = self.signature(shingle_hashes(tokens))
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        candidates = sorted({doc for band, key in enumerate(keys) for doc in self.buckets[band].get(key, ())})
+        cluster, is_new = None, True
+        if candidates:
+            similarity = (self.signatures[candidates] == signature).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] >= self.threshold:
+                cluster, is_new = self.clusters[candidates[best]], False
+        if cluster is None:
+            cluster, self.cluster_count = self.cluster_count, self.cluster_count + 1
+        doc = len(self.clusters)
+        self.signatures = np.vstack([self.signatures, signature])
+        self.clusters.append(cluster)
+        for band, key in enumerate(keys):
+            self.buckets[band].setdefault(key, []).append(doc)
+        return cluster, is_new
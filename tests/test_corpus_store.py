@@ -0,0 +1,41 @@
+# test_corpus_store.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import CorpusStore
+
+def make_results(analysis: str, submission_ids=("101", "102"), mode: str = "One by One") -> dict:
+    return {
+        'contest_id': "2000", 'problem_index': "A", 'mode': mode, 'language': "C++17 (GCC 7-32)",
+        'problem_statement': "Answer range maximum queries.",
+        'solutions': [{'id': submission_id, 'code': "struct SegTree { int query(int l, int r); };", 'analysis': analysis}
+                      for submission_id in submission_ids],
+    }
+
+def test_rerunning_an_analysis_replaces_it(tmp_path):
+    store = CorpusStore(str(tmp_path / "corpus.sqlite3"))
+    store.save_run(make_results("segment tree, first pass"))
+    store.save_run(make_results("segment tree, second pass"))
+    latest = store.save_run(make_results("segment tree, third pass"))
+    hits = store.search("segment")
+    assert sorted(hit['submission_id'] for hit in hits) == ["101", "102"]
+    assert {hit['run_id'] for hit in hits} == {latest}
+    assert store.search("first") == []
+    assert store.search(identifier="seg") and len(store.search(identifier="seg")) == 2
+    assert store.stats() == {"runs": 1, "solutions": 2}
+
+def test_partial_rerun_keeps_the_other_submissions(tmp_path):
+    store = CorpusStore(str(tmp_path / "corpus.sqlite3"))
+    first = store.save_run(make_results("segment tree"))
+    second = store.save_run(make_results("segment tree again", submission_ids=("101",)))
+    assert {hit['submission_id']: hit['run_id'] for hit in store.search("segment")} == {"101": second, "102": first}
+    assert store.load_run(first) is not None
+
+def test_modes_are_stored_separately(tmp_path):
+    store = CorpusStore(str(tmp_path / "corpus.sqlite3"))
+    store.save_run(make_results("segment tree"))
+    store.save_run(make_results("segment tree", mode="All Together"))
+    assert len(store.search("segment")) == 4
@@ -0,0 +1,55 @@
+# test_parsers.py
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+from scraping_logic import parse_problem_statement, parse_submission_code, parse_submission_rows, _status_page_count
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_problem_statement_keeps_title_and_limits():
+    statement = parse_problem_statement(read_fixture("problem.html"))
+    assert statement.startswith("A. Balanced Segments")
+    assert "256 megabytes" in statement
+    assert "standard input" in statement
+
+def test_problem_statement_missing():
+    assert parse_problem_statement("<html><body><p>Not found</p></body></html>") is None
+
+def test_submission_rows():
+    rows = parse_submission_rows(read_fixture("status.html"))
+    assert len(rows) == 60
+    assert rows[0] == {'id': '300000001', 'author': 'user0', 'problem': 'A', 'language': 'C++17 (GCC 7-32)',
+                       'verdict': 'OK', 'time_ms': 93, 'memory_kb': 3900}
+    assert rows[-1]['id'] == '300000060'
+    assert rows[-1]['time_ms'] == 93 + 7 * 59
+    assert rows[-1]['memory_kb'] == 3900 + 100 * 59
+    assert len({row['id'] for row in rows}) == 60
+
+def test_submission_rows_filters():
+    html = read_fixture("status.html")
+    python_rows = parse_submission_rows(html, language_name="Python 3")
+    assert len(python_rows) == 15
+    assert all(row['language'] == "Python 3" for row in python_rows)
+    assert len(parse_submission_rows(html, problem_letter="a")) == 60
+    assert parse_submission_rows(html, problem_letter="B") == []
+    assert parse_submission_rows(html, verdict="WRONG_ANSWER") == []
+    assert _status_page_count(html) == 1
+
+def test_submission_code_unescapes_source():
+    first = parse_submission_code(read_fixture("submission_1.html"))
+    assert first.startswith("#include <bits/stdc++.h>")
+    assert "struct SegTree" in first
+    assert "&lt;" not in first and "&amp;" not in first
+    assert "solveRange" in parse_submission_code(read_fixture("submission_4.html"))
+    python_source = parse_submission_code(read_fixture("submission_3.html"))
+    assert "#include" not in python_source
+
+def test_submission_code_missing():
+    assert parse_submission_code("<html><body><pre>nothing</pre></body></html>") is None
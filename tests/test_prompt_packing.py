@@ -0,0 +1,84 @@
+# test_prompt_packing.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_packing import compact_code, estimate_tokens, truncate_to_tokens, TRUNCATION_MARKER
+
+FUNCTOR_COMPARATOR = """#include <bits/stdc++.h>
+using namespace std;
+
+struct Cmp {
+    bool operator()(const pair<int, int>& a, const pair<int, int>& b) const {
+        return a.second > b.second;
+    }
+};
+
+int unused(int x) {
+    return x * 2;
+}
+
+int main() {
+    priority_queue<pair<int, int>, vector<pair<int, int>>, Cmp> pq;
+    pq.push({1, 2});
+    cout << pq.top().first << endl;
+}
+"""
+
+MEMBER_FUNCTION = """#include <bits/stdc++.h>
+using namespace std;
+
+struct DSU {
+    vector<int> p;
+    DSU(int n) : p(n) { iota(p.begin(), p.end(), 0); }
+    int find(int x) {
+        return p[x] == x ? x : p[x] = find(p[x]);
+    }
+    void reset() {
+        p.clear();
+    }
+};
+
+int main() {
+    DSU d(5);
+    cout << d.find(3) << endl;
+}
+"""
+
+DECORATED_HELPER = """import functools
+
+@functools.lru_cache(maxsize=None)
+def unused(n):
+    return n
+
+def solve(n):
+    return n + 1
+
+print(solve(int(input())))
+"""
+
+def test_functor_comparator_keeps_its_body():
+    compacted = compact_code(FUNCTOR_COMPARATOR, "cpp")
+    assert "bool operator()(const pair<int, int>& a, const pair<int, int>& b) const {" in compacted
+    assert "return a.second > b.second;" in compacted
+    assert "unused" not in compacted
+
+def test_member_functions_are_not_removed():
+    compacted = compact_code(MEMBER_FUNCTION, "cpp")
+    assert "int find(int x) {" in compacted
+    # Members are left alone even when nothing calls them; only free functions are dropped.
+    assert "void reset() {" in compacted
+
+def test_decorator_is_removed_with_its_definition():
+    compacted = compact_code(DECORATED_HELPER, "python")
+    assert "lru_cache" not in compacted
+    assert "unused" not in compacted
+    assert compacted.splitlines()[1] == "def solve(n):"
+
+def test_truncate_cuts_inside_the_line_that_does_not_fit():
+    truncated = truncate_to_tokens("line one short\n" + "int a=1;" * 2000, 50)
+    assert truncated.startswith("line one short\nint a=1;")
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert 45 <= estimate_tokens(truncated) <= 50
@@ -0,0 +1,66 @@
+# test_scraping_http.py
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import scraping_logic
+from config import FETCH_RETRIES, LANGUAGE_OPTIONS
+from stub_server import StubServer, load_fixtures
+
+@pytest.fixture
+def serve(monkeypatch):
+    servers = []
+    def start(fixtures=None):
+        server = StubServer(fixtures=fixtures).start()
+        servers.append(server)
+        monkeypatch.setenv("CODEFORCES_BASE_URL", server.url)
+        return server
+    monkeypatch.setattr(scraping_logic, "FETCH_RATE_PER_HOST", 1000.0)
+    monkeypatch.setattr(scraping_logic, "FETCH_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(scraping_logic, "FETCH_BACKOFF_MAX", 0.0)
+    yield start
+    for server in servers:
+        server.stop()
+
+def test_fetch_problem_statement(serve):
+    serve()
+    statement = scraping_logic.fetch_problem_statement("2000", "A", 0, use_cache=False)
+    assert statement.startswith("A. Balanced Segments")
+
+def test_list_submissions_applies_the_status_filter(serve):
+    server = serve()
+    submissions = scraping_logic.list_submissions("2000", "A", LANGUAGE_OPTIONS.index("Python 3"), 0, use_cache=False)
+    assert len(submissions) == 15
+    assert all(submission['language'] == "Python 3" for submission in submissions)
+    assert ("POST", "/contest/2000/status") in server.log
+    assert [path for method, path in server.log if "/page/" in path] == ["/contest/2000/status/A/page/1?order=BY_CONSUMED_TIME_ASC"]
+
+def test_status_walk_stops_on_a_repeated_page(serve):
+    fixtures = load_fixtures()
+    # Claim three pages; the stub serves the same rows for every page, like Codeforces does past the last one.
+    fixtures["status"] = fixtures["status"].replace(b'pageIndex="1">1</span>', b'pageIndex="1">1</span><span class="page-index" pageIndex="3">3</span>')
+    server = serve(fixtures)
+    submissions = list(scraping_logic.iter_submissions("2000", "A"))
+    assert len(submissions) == 60
+    assert len([path for method, path in server.log if "/page/" in path]) == 2
+
+def test_get_code_with_retry(serve):
+    serve()
+    code = scraping_logic.get_code_with_retry("2000", "300000001", 0, use_cache=False)
+    assert code.startswith("#include <bits/stdc++.h>")
+
+def test_missing_submission_is_not_retried(serve):
+    server = serve()
+    assert scraping_logic.get_code_with_retry("2000", "missing", 0, use_cache=False) is None
+    assert server.requests == 1
+
+def test_page_without_source_is_retried(serve):
+    server = serve({**load_fixtures(), "submission_1": b"<html><body>Loading...</body></html>"})
+    assert scraping_logic.get_code_with_retry("2000", "300000001", 0, use_cache=False) is None
+    assert server.requests == FETCH_RETRIES + 1
@@ -0,0 +1,111 @@
+# tracing.py
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+_current_span_id = contextvars.ContextVar("current_span_id", default=None)
+
+class Tracer:
+    def __init__(self, spans: list | None = None, trace_id: str | None = None):
+        self.spans = spans if spans is not None else []
+        self.trace_id = trace_id or (self.spans[0]['trace_id'] if self.spans else uuid.uuid4().hex)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start_time: float, duration_ms: float, attributes: dict | None = None,
+            parent_id: str | None = None, status: str = "ok", span_id: str | None = None) -> dict:
+        record = {'name': name, 'trace_id': self.trace_id, 'span_id': span_id or uuid.uuid4().hex[:16], 'parent_id': parent_id,
+                  'start_time': start_time, 'duration_ms': round(duration_ms, 3), 'status': status, 'attributes': attributes or {}}
+        with self._lock:
+            self.spans.append(record)
+        return record
+
+def get_tracer() -> Tracer | None:
+    return _current_tracer.get()
+
+@contextmanager
+def use_tracer(tracer: Tracer | None):
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+@contextmanager
+def span(name: str, **attributes):
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield attributes
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    start_time, started = time.time(), time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "error"
+        attributes['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span_id.reset(token)
+        tracer.add(name, start_time, (time.perf_counter() - started) * 1000, attributes, parent_id, status, span_id)
+
+def current_span_id() -> str | None:
+    return _current_span_id.get()
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize_spans(spans: list) -> list:
+    groups = {}
+    for record in spans:
+        groups.setdefault(record['name'], []).append(record)
+    summary = []
+    for name, records in groups.items():
+        durations = [record['duration_ms'] for record in records]
+        def total(attribute):
+            return sum(record['attributes'].get(attribute) or 0 for record in records)
+        summary.append({
+            'span': name, 'calls': len(records), 'errors': sum(record['status'] == "error" for record in records),
+            'total_ms': round(sum(durations), 1), 'p50_ms': round(_percentile(durations, 0.5), 1),
+            'p95_ms': round(_percentile(durations, 0.95), 1), 'max_ms': round(max(durations), 1),
+            'retries': total('retries'), 'bytes': total('bytes'), 'chars': total('chars'),
+            'prompt_chars': total('prompt_chars'), 'response_chars': total('response_chars'),
+        })
+    return sorted(summary, key=lambda row: row['total_ms'], reverse=True)
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def spans_to_json(spans: list) -> str:
+    return json.dumps(spans, indent=2, ensure_ascii=False)
+
+def spans_to_otel(spans: list, service_name: str = "codeforces-analyser") -> str:
+    otel_spans = []
+    for record in spans:
+        start_ns = int(record['start_time'] * 1e9)
+        otel_spans.append({
+            'traceId': record['trace_id'], 'spanId': record['span_id'], 'parentSpanId': record['parent_id'] or "",
+            'name': record['name'], 'kind': 1, 'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(start_ns + int(record['duration_ms'] * 1e6)),
+            'attributes': [{'key': key, 'value': _otel_value(value)} for key, value in record['attributes'].items() if value is not None],
+            'status': {'code': 2 if record['status'] == "error" else 1},
+        })
+    payload = {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': service_name}, 'spans': otel_spans}],
+    }]}
+    return json.dumps(payload, indent=2, ensure_ascii=False)
\ No newline at end of file
@@ -1,10 +1,19 @@
 # ui_components.py
 
+import io
+import time
 import streamlit as st
 from config import (LANGUAGE_OPTIONS, DEFAULT_SLEEP, DEFAULT_SINGLE_SOLUTION_PROMPT, 
                     DEFAULT_COMPARISON_PROMPT, DEFAULT_ALL_TOGETHER_PROMPT, 
-                    LANGUAGE_SYNTAX, ANALYSIS_MODES)
-from gemini_integration import display_chat_interface, initialize_chat
+                    LANGUAGE_SYNTAX, ANALYSIS_MODES, FETCH_BACKENDS, MAX_SOLUTIONS,
+                    DEFAULT_PROMPT_TOKEN_BUDGET, CODE_PREVIEW_LINES, DISTINCT_OVERFETCH, CORPUS_SEARCH_LIMIT)
+from gemini_integration import display_chat_interface, initialize_chat, get_response_cache
+from scraping_logic import get_scrape_cache
+from batch_runner import load_results_file
+from job_service import get_job_service
+from chat_memory import build_chat_context
+from corpus_store import get_corpus_store
+from tracing import summarize_spans, spans_to_json, spans_to_otel
 
 def apply_styling():
     st.markdown("""
@@ -94,9 +103,22 @@ def render_sidebar():
         st.markdown("---")
         st.markdown("##### ⚙️ Fetch & Analyze")
         analysis_mode = st.radio("✨ Analysis Mode", ANALYSIS_MODES, index=0, horizontal=True)
-        n = st.number_input("🔍 Solutions to fetch", 1, 10, 3)
-        sleep_time = st.slider("⏳ Browser wait time (s)", 2, 15, DEFAULT_SLEEP)
-        max_chars = st.slider("✂️ Max chars for analysis", 500, 8000, 4000)
+        n = st.number_input("🔍 Solutions to fetch", 1, MAX_SOLUTIONS, 3)
+        backend = st.radio("🌐 Fetch Backend", FETCH_BACKENDS, index=0, horizontal=True)
+        sleep_time = st.slider("⏳ Browser wait time (s)", 2, 15, DEFAULT_SLEEP, disabled=backend != "Browser")
+        max_chars = st.slider("✂️ Max chars per solution", 500, 8000, 4000)
+        token_budget = st.slider("🧮 Prompt token budget", 2000, 64000, DEFAULT_PROMPT_TOKEN_BUDGET, step=1000)
+        distinct = st.checkbox("🧬 Skip near-duplicate solutions", value=False,
+                               help=f"Fetches up to {DISTINCT_OVERFETCH}× more candidates and analyzes only structurally distinct ones.")
+
+        with st.expander("🗄️ Caches", expanded=False):
+            use_cache = st.checkbox("Use cached pages", value=True)
+            use_llm_cache = st.checkbox("Use cached AI responses", value=True)
+            for label, cache in (("pages", get_scrape_cache()), ("AI responses", get_response_cache())):
+                stats = cache.stats()
+                st.caption(f"{stats['entries']} {label} · {stats['bytes'] / 1024:.0f} KB · {stats['hits']} hits / {stats['misses']} misses")
+                if st.button(f"Clear cached {label}", use_container_width=True):
+                    cache.clear()
 
         st.markdown("---")
         with st.expander("🧠 AI Prompts (Advanced)", expanded=False):
@@ -104,20 +126,152 @@ def render_sidebar():
             comp_prompt = st.text_area("Comparative Analysis Prompt", height=200, value=DEFAULT_COMPARISON_PROMPT)
             all_together_prompt = st.text_area("All Together Analysis Prompt", height=200, value=DEFAULT_ALL_TOGETHER_PROMPT)
         
-        return analysis_mode, contest_id, problem_index, language_name, n, sleep_time, max_chars, single_prompt, comp_prompt, all_together_prompt
+        return analysis_mode, contest_id, problem_index, language_name, n, backend, sleep_time, max_chars, token_budget, use_cache, use_llm_cache, distinct, single_prompt, comp_prompt, all_together_prompt
+
+# cache_data hands every caller its own copy; results are mutated later (chat spans are appended to their trace).
+@st.cache_data(max_entries=4, show_spinner=False)
+def parse_results_upload(data: bytes) -> list:
+    return load_results_file(io.BytesIO(data))
+
+def render_batch_loader():
+    with st.sidebar.expander("📂 Batch Results", expanded=False):
+        uploaded = st.file_uploader("Results file (.jsonl)", type=["jsonl"])
+        if uploaded is None:
+            return
+        records = parse_results_upload(uploaded.getvalue())
+        if not records:
+            st.warning("No results found in this file.")
+            return
+        index = st.selectbox("Problem", range(len(records)),
+                             format_func=lambda i: f"{records[i]['contest_id']}{records[i]['problem_index']} · {records[i]['mode']} · {records[i]['language']}")
+        if st.button("Open Result", use_container_width=True):
+            st.session_state.results = records[index]
+            st.session_state.analysis_complete = True
+            st.session_state.error_message = None
+
+def render_corpus_search():
+    with st.sidebar.expander("🔎 Corpus Search", expanded=False):
+        store = get_corpus_store()
+        stats = store.stats()
+        st.caption(f"{stats['runs']} saved runs · {stats['solutions']} solutions")
+        text = st.text_input("Text", placeholder="e.g. segment tree", help="Matches problem statements, code and analyses.")
+        identifier = st.text_input("Identifier in code", placeholder="e.g. segtree", help="Prefix of a name used in the code.")
+        syntaxes = [""] + sorted(set(LANGUAGE_SYNTAX.values()))
+        syntax = st.selectbox("Language family", syntaxes, format_func=lambda value: value or "Any")
+        if not (text.strip() or identifier.strip() or syntax):
+            return
+        started = time.perf_counter()
+        matches = store.search(text, syntax or None, identifier, CORPUS_SEARCH_LIMIT)
+        st.caption(f"{len(matches)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+        if not matches:
+            return
+        index = st.selectbox("Match", range(len(matches)),
+                             format_func=lambda i: f"{matches[i]['contest_id']}{matches[i]['problem_index']} · {matches[i]['submission_id']} · {matches[i]['language'] or '?'}")
+        if matches[index]['snippet']:
+            st.caption(matches[index]['snippet'])
+        if st.button("Open Match", use_container_width=True):
+            st.session_state.results = store.load_run(matches[index]['run_id'])
+            st.session_state.active_solution_id = matches[index]['submission_id']
+            st.session_state.analysis_complete = True
+            st.session_state.error_message = None
+
+def run_pipeline_live(params):
+    with st.container(border=True):
+        st.subheader("⚡ Live Analysis")
+        queue_status = st.empty()
+        problem_status = st.empty()
+        fetch_bar = st.progress(0.0, text="Fetching solutions...")
+        analyze_bar = st.progress(0.0, text="Waiting for solutions to analyze...")
+        panels = st.container()
+    placeholders, started, finished, queue_state = {}, 0, 0, None
+    # Identical requests from other sessions share one job; this session replays its events and only touches its own elements.
+    service = get_job_service()
+    job = service.submit(params)
+    try:
+        cursor, complete = 0, False
+        while not complete:
+            events, cursor, complete = job.events_since(cursor, timeout=0.05)
+            # The loop wakes every 50 ms; only send the caption to the browser when the queue state actually changed.
+            position, subscribers = service.position(job), job.subscribers
+            if (position, subscribers) != queue_state:
+                queue_state = position, subscribers
+                shared = f" · shared with {subscribers - 1} other session(s)" if subscribers > 1 else ""
+                queue_status.caption(f"⏳ Queued at position {position}{shared}" if position else f"▶️ Running{shared}")
+            for event in events:
+                if event['type'] == 'stage':
+                    problem_status.caption("📄 Problem statement and submissions fetched." if event['status'] == 'done' else "📄 Fetching problem statement and submissions...")
+                elif event['type'] == 'progress':
+                    fetch_bar.progress(event['done'] / event['total'], text=f"Fetched {event['done']}/{event['total']} solutions")
+                elif event['type'] == 'start':
+                    started += 1
+                    with panels.expander(event['label'], expanded=event['key'] in ("combined", "comparison")):
+                        placeholders[event['key']] = st.empty()
+                    analyze_bar.progress(finished / started, text=f"Analyzed {finished}/{started} started analyses")
+                elif event['type'] == 'chunk':
+                    placeholders[event['key']].markdown(event['text'] + " ▌")
+                elif event['type'] == 'done':
+                    finished += 1
+                    result = event['result']
+                    if result['error']:
+                        placeholders[event['key']].error(f"Analysis failed: {result['error']}")
+                    else:
+                        placeholders[event['key']].markdown(result['text'])
+                    analyze_bar.progress(finished / started, text=f"Analyzed {finished}/{started} started analyses")
+    finally:
+        # Leaving (including a stopped rerun) unsubscribes, so other sessions' share counts stay accurate.
+        service.release(job)
+    return job.outcome()
+
+def render_metrics_panel(spans):
+    with st.expander("📈 Metrics", expanded=False):
+        root = next((record for record in spans if record['name'] == "run_pipeline"), None)
+        if root:
+            st.caption(f"Total run time: {root['duration_ms'] / 1000:.2f}s across {len(spans)} spans.")
+        st.dataframe(summarize_spans(spans), use_container_width=True, hide_index=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("Download spans (JSON)", spans_to_json(spans), file_name="trace.json", mime="application/json", use_container_width=True)
+        col2.download_button("Download OTLP JSON", spans_to_otel(spans), file_name="trace.otlp.json", mime="application/json", use_container_width=True)
 
 def render_results_area(res, language_name, max_chars):
+    if res.get("packing"):
+        packing = res["packing"]
+        st.caption(f"🧮 Prompt packing saved ~{packing['saved_tokens']:,} tokens ({packing['original_tokens']:,} → {packing['packed_tokens']:,}).")
+    if res.get("clusters"):
+        clusters = res["clusters"]
+        st.caption(f"🧬 {sum(cluster['size'] for cluster in clusters)} candidate solutions formed {len(clusters)} distinct approaches; "
+                   f"{sum(cluster['representative'] is not None for cluster in clusters)} were analyzed.")
+    if res.get("trace"):
+        render_metrics_panel(res["trace"])
     if res.get("mode") == "One by One":
         render_one_by_one_dashboard(res, language_name, max_chars)
     elif res.get("mode") == "All Together":
         render_all_together_results(res)
 
+def render_code(code, language, key):
+    # Long sources are sent to the browser only on request; a preview keeps reruns light.
+    lines = code.splitlines()
+    if len(lines) <= CODE_PREVIEW_LINES or st.toggle(f"Show all {len(lines)} lines", key=f"show_code_{key}"):
+        st.code(code, language=language)
+    else:
+        st.code("\n".join(lines[:CODE_PREVIEW_LINES]) + "\n...", language=language)
+
+@st.fragment
+def render_chat_tab(res, active_sol, language_name):
+    st.info("Converse with the AI about this specific solution.")
+    if f"chat_session_{active_sol['id']}" not in st.session_state:
+        chat_context = build_chat_context(res['problem_statement'], active_sol['code'], active_sol.get('analysis'),
+                                          LANGUAGE_SYNTAX.get(active_sol.get('language', language_name), "text"))
+        st.session_state[f"chat_session_{active_sol['id']}"] = initialize_chat(chat_context)
+    display_chat_interface(chat_key=active_sol['id'], trace=res.get('trace'))
+
+@st.fragment
 def render_one_by_one_dashboard(res, language_name, max_chars):
     left_panel, right_panel = st.columns([1, 5])
 
     with left_panel:
         st.subheader("Solutions")
-        solution_options = {sol['id']: f"Solution #{i+1}" for i, sol in enumerate(res['solutions'])}
+        solution_options = {sol['id']: f"Solution #{i+1}" + (f" (×{sol['cluster_size']})" if sol.get('cluster_size', 1) > 1 else "")
+                            for i, sol in enumerate(res['solutions'])}
         
         active_id = st.radio(
             "Select a solution:",
@@ -133,32 +287,42 @@ def render_one_by_one_dashboard(res, language_name, max_chars):
             with st.container():
                 st.markdown('<div class="display-panel">', unsafe_allow_html=True)
                 st.header(f"Analysis for Solution ID: {active_sol['id']}")
+                if active_sol.get('language'):
+                    st.caption(f"{active_sol['language']} · {active_sol.get('time_ms')} ms · {active_sol.get('memory_kb')} KB · by {active_sol.get('author')}")
+                if active_sol.get('cluster_size', 1) > 1:
+                    st.caption(f"🧬 {active_sol['cluster_size']} submissions share this approach.")
                 
                 tab1, tab2, tab3 = st.tabs(["🤖 Analysis", "📄 Code", "💬 Chat"])
                 with tab1:
-                    st.markdown(active_sol['analysis'])
+                    if active_sol.get('error'):
+                        st.error(f"Analysis failed: {active_sol['error']}")
+                    else:
+                        st.markdown(active_sol['analysis'])
                 with tab2:
-                    st.code(active_sol['code'], language=LANGUAGE_SYNTAX.get(language_name, "text"))
+                    render_code(active_sol['code'], LANGUAGE_SYNTAX.get(active_sol.get('language', language_name), "text"), active_sol['id'])
                 with tab3:
-                    st.info("Converse with the AI about this specific solution.")
-                    chat_context = f"Problem Statement:\n{res['problem_statement']}\n\nSolution Code (ID: {active_sol['id']}):\n```\n{active_sol['code']}\n```\n\nAI Analysis:\n{active_sol['analysis']}"
-                    if f"chat_session_{active_sol['id']}" not in st.session_state:
-                        st.session_state[f"chat_session_{active_sol['id']}"] = initialize_chat(chat_context)
-                    display_chat_interface(chat_key=active_sol['id'])
+                    render_chat_tab(res, active_sol, language_name)
                 st.markdown('</div>', unsafe_allow_html=True)
 
     if 'comparison' in res:
         with st.container(border=True):
             st.subheader("🏆 Final Verdict")
             with st.expander("View Comparative Analysis"):
-                st.markdown(res['comparison'])
+                if res.get('comparison_error'):
+                    st.error(f"Comparison failed: {res['comparison_error']}")
+                else:
+                    st.markdown(res['comparison'])
 
 def render_all_together_results(res):
     with st.container(border=True):
         st.subheader("📚 Combined Analysis Report")
         for i, sol in enumerate(res['solutions']):
-            with st.expander(f"View Code for Solution #{i+1} (ID: {sol['id']})"):
-                st.code(sol['code'], language=LANGUAGE_SYNTAX.get(res.get("language"), "text"))
+            shared = f" · {sol['cluster_size']} submissions share this approach" if sol.get('cluster_size', 1) > 1 else ""
+            with st.expander(f"View Code for Solution #{i+1} (ID: {sol['id']}){shared}"):
+                render_code(sol['code'], LANGUAGE_SYNTAX.get(sol.get('language', res.get("language")), "text"), sol['id'])
         
         st.markdown("---")
-        st.markdown(res.get('combined_analysis', "No analysis was generated."))
\ No newline at end of file
+        if res.get('combined_error'):
+            st.error(f"Analysis failed: {res['combined_error']}")
+        else:
+            st.markdown(res.get('combined_analysis') or "No analysis was generated.")
\ No newline at end of file